@@ -1,7 +1,7 @@
 import streamlit as st
 import cv2
 import numpy as np
-import time
+import uuid
 from datetime import datetime
 import sys
 import os
@@ -15,7 +15,20 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets
 from utils.detection import HumanDetector
 from utils.motion import MotionAnalyzer
 from utils.alerts import AlertSystem
-from assets.config import APP_CONFIG, CAMERA_CONFIG, DETECTION_CONFIG, UI_CONFIG
+from utils.alert_store import AlertStore
+from utils.notify import AlertDispatcher, build_channels
+from utils.pipeline import MonitoringPipeline
+from utils.cadence import AdaptiveDetector
+from utils.gate import MotionGate
+from utils.tracker import ByteTracker
+from utils.activity import ActivityClassifier
+from utils.preprocess import FramePreprocessor, rotate_frame
+from utils.camera import CameraStream
+from utils.clips import ClipRecorder
+from utils.stream import MJPEGStreamer, annotate_frame
+from utils.metrics import MetricsServer, rss_bytes
+from models.cache import LOAD_REPORTS, shared_backend
+from assets.config import ALERT_CONFIG, APP_CONFIG, CAMERA_CONFIG, DETECTION_CONFIG, METRICS_CONFIG, PROFILER_CONFIG, UI_CONFIG
 
 # Page configuration
 st.set_page_config(
@@ -25,41 +38,25 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Frame rotation function - MOVED TO TOP
-def rotate_frame(frame, angle):
-    """Rotate frame by specified angle"""
-    if angle == 0:
-        return frame
-    
-    height, width = frame.shape[:2]
-    center = (width // 2, height // 2)
-    
-    rotation_matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
-    rotated_frame = cv2.warpAffine(frame, rotation_matrix, (width, height))
-    
-    return rotated_frame
-
 # Camera initialization with rotation support
 def init_camera(camera_type, url=None):
+    # Connects (and reconnects) in the background, so this never blocks the UI
     try:
         if camera_type == "Webcam":
-            cap = cv2.VideoCapture(0)
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_CONFIG["frame_width"])
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_CONFIG["frame_height"])
-            return cap, "Webcam Connected"
-        else:
-            cap = cv2.VideoCapture(url)
-            time.sleep(2)
-            if cap.isOpened():
-                return cap, f"IP Camera Connected: {url}"
-            return None, "Failed to connect to IP camera"
+            return CameraStream(CAMERA_CONFIG["webcam_index"], name="webcam"), "Webcam Connecting"
+        stream = CameraStream(url)
+        return stream, f"IP Camera Connecting: {stream.name}"
     except Exception as e:
         return None, f"Camera error: {str(e)}"
 
-# Load CSS
+# Load CSS (read from disk once per process)
+@st.cache_data
+def read_css(path='assets/style.css'):
+    with open(path) as f:
+        return f.read()
+
 def load_css():
-    with open('assets/style.css') as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    st.markdown(f'<style>{read_css()}</style>', unsafe_allow_html=True)
 
 load_css()
 
@@ -131,18 +128,65 @@ document.addEventListener('input', function(e) {
 </script>
 """, unsafe_allow_html=True)
 
+# One alert store (SQLite, WAL) shared by every browser session
+@st.cache_resource
+def get_alert_store():
+    return AlertStore()
+
+# Notifications are delivered off the frame path by one shared dispatcher
+@st.cache_resource
+def get_alert_dispatcher():
+    channels = build_channels()
+    return AlertDispatcher(channels) if channels else None
+
+# One MJPEG server with a feed per session: each feed is encoded once however many viewers are open
+@st.cache_resource
+def get_streamer():
+    streamer = MJPEGStreamer()
+    try:
+        streamer.start()
+    except OSError as e:
+        print(f"MJPEG stream unavailable ({e}), falling back to st.image")
+        return None
+    return streamer
+
+# Prometheus text endpoint for every pipeline in this process
+@st.cache_resource
+def get_metrics_server():
+    if not METRICS_CONFIG["enabled"]:
+        return None
+    server = MetricsServer()
+    try:
+        server.start()
+    except OSError as e:
+        print(f"Metrics endpoint unavailable ({e})")
+        return None
+    return server
+
+# One loaded, warmed-up model for every session; sessions only add their own smoothing state
+@st.cache_resource(show_spinner="Loading detection model...")
+def get_detection_backend():
+    return shared_backend()
+
 # Initialize session state
 def initialize_session_state():
     if 'detector' not in st.session_state:
-        st.session_state.detector = HumanDetector()
+        st.session_state.detector = HumanDetector(
+            confidence_threshold=DETECTION_CONFIG["min_human_confidence"],
+            backend=get_detection_backend())
     if 'motion_analyzer' not in st.session_state:
         st.session_state.motion_analyzer = MotionAnalyzer()
     if 'alert_system' not in st.session_state:
-        st.session_state.alert_system = AlertSystem()
+        st.session_state.alert_system = AlertSystem(store=get_alert_store(),
+                                                    dispatcher=get_alert_dispatcher())
     if 'monitoring' not in st.session_state:
         st.session_state.monitoring = False
     if 'camera' not in st.session_state:
         st.session_state.camera = None
+    if 'pipeline' not in st.session_state:
+        st.session_state.pipeline = None
+    if 'pipeline_rotation' not in st.session_state:
+        st.session_state.pipeline_rotation = 0
     if 'frame_count' not in st.session_state:
         st.session_state.frame_count = 0
     if 'selected_camera' not in st.session_state:
@@ -151,6 +195,11 @@ def initialize_session_state():
         st.session_state.frame_rotation = 0
     if 'last_frame' not in st.session_state:
         st.session_state.last_frame = None
+    if 'panel_cache' not in st.session_state:
+        st.session_state.panel_cache = {}
+    if 'stream_key' not in st.session_state:
+        # This session's MJPEG feed; other sessions' pipelines never write to it
+        st.session_state.stream_key = uuid.uuid4().hex
 
 initialize_session_state()
 
@@ -175,7 +224,7 @@ with st.sidebar:
             <div style="font-size: 0.8rem; color: var(--gray);">
                 🎯 Frames: <strong>{st.session_state.frame_count}</strong><br>
                 🚨 Alerts: <strong>{len(st.session_state.alert_system.alerts)}</strong><br>
-                ⏱️ Uptime: <strong>{st.session_state.frame_count // 10}s</strong>
+                ⏱️ Uptime: <strong>{int(st.session_state.pipeline.uptime) if st.session_state.pipeline else 0}s</strong>
             </div>
         </div>
         """
@@ -292,16 +341,38 @@ with st.sidebar:
     # Quick actions
     test_btn = st.button("🔄 TEST CAMERA", use_container_width=True, key="test_button")
     
+    # Sample the running pipeline for a window of frames (no restart needed)
+    profile_btn = st.button(
+        f"🔬 PROFILE {PROFILER_CONFIG['frames']} FRAMES",
+        use_container_width=True,
+        disabled=st.session_state.pipeline is None,
+        key="profile_button"
+    )
+    profiler = st.session_state.pipeline.profiler if st.session_state.pipeline else None
+    if profile_btn and st.session_state.pipeline is not None:
+        profiler = st.session_state.pipeline.profile()
+    if profiler is not None:
+        if profiler.running:
+            st.info(f"🔬 Profiling... {profiler.samples} samples")
+        elif profiler.paths:
+            st.caption("🔬 Last profile: " + " • ".join(profiler.paths))
+    
     # Handle button actions
     if start_btn:
         st.session_state.monitoring = True
         st.session_state.alert_system.alerts = []
         st.session_state.frame_count = 0
         st.session_state.camera = None  # Reset camera to force reinitialization
+        st.session_state.pipeline = None
         st.rerun()
     
     if stop_btn:
         st.session_state.monitoring = False
+        if st.session_state.pipeline:
+            st.session_state.pipeline.stop()
+            st.session_state.pipeline = None
+        if get_streamer() is not None:
+            get_streamer().remove_feed(st.session_state.stream_key)
         if st.session_state.camera:
             st.session_state.camera.release()
             st.session_state.camera = None
@@ -319,14 +390,11 @@ with st.sidebar:
             else:
                 test_url = 0  # Webcam
             
-            # Try to connect to camera
-            test_cap = cv2.VideoCapture(test_url)
-            time.sleep(2)  # Give time for connection
+            # Try to connect to camera, returning as soon as the first frame arrives
+            test_cap = CameraStream(test_url, name="camera-test")
+            ret, test_frame = test_cap.read(timeout=CAMERA_CONFIG["test_timeout"])
             
-            if test_cap.isOpened():
-                # Try to read a frame
-                ret, test_frame = test_cap.read()
-                
+            if test_cap.health["connects"] > 0:
                 if ret and test_frame is not None:
                     # SUCCESS: Camera is working
                     test_camera_placeholder.success("✅ Camera test completed! Connection successful.")
@@ -365,9 +433,6 @@ with st.sidebar:
         except Exception as e:
             # Error during testing
             test_camera_placeholder.error(f"❌ Camera test failed: {str(e)}")
-        
-        # Keep the message visible for a while
-        time.sleep(3)
 
 # Main Dashboard Layout
 col1, col2 = st.columns([2, 1])
@@ -416,47 +481,210 @@ with col2:
     
     status_container = st.container()
     
-    # Alerts Card
-    st.markdown("""
+    # Alerts Card (header badge and list are drawn by the alerts panel)
+    alerts_container = st.container()
+
+# Stats Grid
+stats_container = st.container()
+
+# Per-stage latency
+metrics_container = st.container()
+
+# Panels keep their last HTML and only rebuild it when their inputs change
+def render_cached(slot, key, build):
+    cache = st.session_state.panel_cache
+    if slot not in cache or cache[slot][0] != key:
+        cache[slot] = (key, build())
+    st.markdown(cache[slot][1], unsafe_allow_html=True)
+
+def activity_html(activity, motion_level, confidence):
+    if activity == "no_humans":
+        return f"""
+        <div class="alert-box alert-info">
+            <div style="display: flex; align-items: center; justify-content: center; gap: 0.5rem;">
+                <span>🚫</span>
+                <span>NO HUMANS DETECTED</span>
+            </div>
+            <div style="font-size: 0.9rem; margin-top: 0.5rem; opacity: 0.8;">
+                Monitoring background activity
+            </div>
+        </div>
+        """
+    elif activity == "running":
+        return f"""
+        <div class="alert-box alert-danger">
+            <div style="display: flex; align-items: center; justify-content: center; gap: 0.5rem;">
+                <span>🚨</span>
+                <span>RUNNING DETECTED!</span>
+            </div>
+            <div style="font-size: 0.9rem; margin-top: 0.5rem;">
+                Motion: {motion_level:.1%} | Confidence: {confidence.upper()}
+            </div>
+        </div>
+        """
+    return f"""
+    <div class="alert-box alert-success">
+        <div style="display: flex; align-items: center; justify-content: center; gap: 0.5rem;">
+            <span>✅</span>
+            <span>{activity.upper()}</span>
+        </div>
+        <div style="font-size: 0.9rem; margin-top: 0.5rem;">
+            Motion: {motion_level:.1%} | Confidence: {confidence.upper()}
+        </div>
+    </div>
+    """
+
+def status_html(camera_type, humans, human_confidence, activity, gate, rates, last_update):
+    return f"""
+    <div style="margin: 1rem 0;">
+        <div class="status-indicator {'status-active' if st.session_state.monitoring else 'status-inactive'}" style="margin-bottom: 1rem;">
+            {'✅ ACTIVE MONITORING' if st.session_state.monitoring else '❌ SYSTEM READY'}
+        </div>
+        
+        <div style="background: rgba(30, 41, 59, 0.6); padding: 1rem; border-radius: 8px; border: 1px solid rgba(255,255,255,0.1);">
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 0.5rem; font-size: 0.9rem;">
+                <div style="color: var(--gray);">Camera:</div>
+                <div style="font-weight: 600;">{camera_type}</div>
+                
+                <div style="color: var(--gray);">Humans:</div>
+                <div style="font-weight: 600; color: {'var(--success)' if humans > 0 else 'var(--gray)'};">
+                    {humans}
+                </div>
+                
+                <div style="color: var(--gray);">Confidence:</div>
+                <div style="font-weight: 600;">{human_confidence:.1%}</div>
+                
+                <div style="color: var(--gray);">Activity:</div>
+                <div style="font-weight: 600; color: {'var(--danger)' if activity == 'running' else 'var(--success)'};">
+                    {activity}
+                </div>
+                
+                <div style="color: var(--gray);">Inferred:</div>
+                <div style="font-weight: 600;">{gate[0]}</div>
+                
+                <div style="color: var(--gray);">Skipped:</div>
+                <div style="font-weight: 600;">{gate[1]} ({gate[2]:.0%})</div>
+                
+                <div style="color: var(--gray);">Capture FPS:</div>
+                <div style="font-weight: 600;">{rates[0]:.1f}</div>
+                
+                <div style="color: var(--gray);">Processed FPS:</div>
+                <div style="font-weight: 600;">{rates[1]:.1f}</div>
+                
+                <div style="color: var(--gray);">Dropped:</div>
+                <div style="font-weight: 600;">{rates[2]}</div>
+            </div>
+        </div>
+        
+        <div style="margin-top: 1rem; font-size: 0.8rem; color: var(--gray); text-align: center;">
+            Last update: {last_update}
+        </div>
+    </div>
+    """
+
+def alerts_html(recent_alerts, total):
+    html = f"""
     <div class="dashboard-card">
         <div class="card-header">
             <span class="card-icon">🚨</span>
             <span class="card-title">Alert History</span>
             <div style="margin-left: auto;">
                 <span style="background: var(--danger); color: white; padding: 0.25rem 0.5rem; border-radius: 20px; font-size: 0.8rem;">
-                    {0}
+                    {total}
                 </span>
             </div>
         </div>
     </div>
-    """.format(len(st.session_state.alert_system.alerts)), unsafe_allow_html=True)
-    
-    alerts_container = st.container()
+    """
+    if not recent_alerts:
+        return html + """
+        <div class="alert-box alert-info">
+            <div style="text-align: center; padding: 1rem;">
+                <div style="font-size: 2rem; margin-bottom: 0.5rem;">📝</div>
+                <div>No alerts yet</div>
+                <div style="font-size: 0.8rem; opacity: 0.7; margin-top: 0.5rem;">
+                    System monitoring normally
+                </div>
+            </div>
+        </div>
+        """
+    html += "<div style='max-height: 300px; overflow-y: auto;'>"
+    for alert in recent_alerts:
+        alert_type = "alert-danger" if alert["type"] == "danger" else "alert-warning"
+        html += f"""
+        <div class="alert-box {alert_type}" style="margin: 0.5rem 0; padding: 0.75rem; font-size: 0.9rem;">
+            <div style="display: flex; justify-content: between; align-items: start;">
+                <div style="flex: 1;">
+                    <strong>{alert['activity'].upper()}</strong><br>
+                    <span style="font-size: 0.8rem; opacity: 0.8;">
+                        Motion: {alert['motion_level']:.1%} • {alert['timestamp']}
+                    </span>{f"<br><span style='font-size: 0.75rem; opacity: 0.7;'>🎞️ {alert['clip_path']}</span>" if alert.get('clip_path') else ""}
+                </div>
+            </div>
+        </div>
+        """
+    return html + "</div>"
 
-# Stats Grid
-st.markdown("""
-<div class="stats-grid">
-    <div class="stat-card">
-        <div class="stat-number" id="frame-count">0</div>
-        <div class="stat-label">Frames Processed</div>
-    </div>
-    <div class="stat-card">
-        <div class="stat-number" id="human-count">0</div>
-        <div class="stat-label">Humans Detected</div>
-    </div>
-    <div class="stat-card">
-        <div class="stat-number" id="alert-count">0</div>
-        <div class="stat-label">Total Alerts</div>
+def stats_html(frames, humans, alerts, uptime):
+    return f"""
+    <div class="stats-grid">
+        <div class="stat-card">
+            <div class="stat-number">{frames}</div>
+            <div class="stat-label">Frames Processed</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-number">{humans}</div>
+            <div class="stat-label">Humans Detected</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-number">{alerts}</div>
+            <div class="stat-label">Total Alerts</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-number">{uptime}s</div>
+            <div class="stat-label">System Uptime</div>
+        </div>
     </div>
-    <div class="stat-card">
-        <div class="stat-number" id="uptime">0s</div>
-        <div class="stat-label">System Uptime</div>
+    """
+
+def metrics_html(stage_ms, url, footer):
+    rows = "".join(f"""
+            <div style="color: var(--gray);">{stage}</div>
+            <div style="font-weight: 600;">{p50:.1f} ms</div>
+            <div style="font-weight: 600;">{p95:.1f} ms</div>""" for stage, (p50, p95) in stage_ms)
+    return f"""
+    <div class="dashboard-card">
+        <div class="card-header">
+            <span class="card-icon">⏱️</span>
+            <span class="card-title">Stage Latency</span>
+            <div style="margin-left: auto; font-size: 0.8rem; color: var(--gray);">
+                {f'<a href="{url}" target="_blank">{url}</a>' if url else ''}
+            </div>
+        </div>
+        <div style="display: grid; grid-template-columns: 2fr 1fr 1fr; gap: 0.25rem 1rem; font-size: 0.9rem; padding: 0.5rem 1rem;">
+            <div style="color: var(--gray);">Stage</div>
+            <div style="color: var(--gray);">p50</div>
+            <div style="color: var(--gray);">p95</div>{rows}
+        </div>
+        <div style="font-size: 0.8rem; color: var(--gray); padding: 0 1rem 0.5rem;">{footer}</div>
     </div>
-</div>
-""", unsafe_allow_html=True)
+    """
+
+def release_session(cap, stream_key):
+    """on_idle callback freeing what an abandoned session's pipeline holds (no session_state access)"""
+    def release(pipeline):
+        if get_streamer() is not None:
+            get_streamer().remove_feed(stream_key)
+        cap.release()
+    return release
+
+def start_pipeline(camera_type, ip_url, alert_cooldown, confidence_threshold, motion_sensitivity):
+    """Open the camera and start (or retune) the background pipeline, returns it or None"""
+    # A pipeline that stopped itself while nobody polled it has already released the camera
+    if st.session_state.pipeline is not None and st.session_state.pipeline.stopped_idle:
+        st.session_state.pipeline = None
+        st.session_state.camera = None
 
-# Main monitoring loop - FIXED to prevent reloading
-def main_monitoring_loop():
     # Initialize camera if needed
     if st.session_state.camera is None:
         if camera_type == "IP Camera":
@@ -470,197 +698,151 @@ def main_monitoring_loop():
     
     if cap is None or not cap.isOpened():
         st.error("❌ Cannot access camera. Please check connection.")
+        return None
+    
+    # Restart the pipeline when the orientation changes mid-run
+    rotation = st.session_state.frame_rotation
+    if st.session_state.pipeline is not None and st.session_state.pipeline_rotation != rotation:
+        st.session_state.pipeline.stop()
+        st.session_state.pipeline = None
+    
+    # Start the background pipeline once; panels only read its newest result
+    if st.session_state.pipeline is None:
+        st.session_state.pipeline_rotation = rotation
+        # Alerts are stored per camera, so each session's history shows only its own camera
+        camera_id = getattr(cap, "name", "default")
+        st.session_state.alert_system.camera_id = camera_id
+        st.session_state.pipeline = MonitoringPipeline(
+            cap,
+            AdaptiveDetector(st.session_state.detector),
+            st.session_state.motion_analyzer,
+            st.session_state.alert_system,
+            preprocess=FramePreprocessor(
+                rotation, display_size=(CAMERA_CONFIG["frame_width"], CAMERA_CONFIG["frame_height"])),
+            alert_cooldown=alert_cooldown,
+            gate=MotionGate(),
+            tracker=ByteTracker(),
+            activity_classifier=ActivityClassifier(),
+            camera_id=camera_id,
+            recorder=ClipRecorder(camera_id) if ALERT_CONFIG["clips"]["enabled"] else None,
+            idle_timeout=UI_CONFIG["idle_timeout"],
+            on_idle=release_session(cap, st.session_state.stream_key)
+        )
+        st.session_state.pipeline.start()
+        if get_streamer() is not None:
+            get_streamer().add_feed(st.session_state.stream_key, st.session_state.pipeline.latest_result,
+                                    rotation)
+    
+    pipeline = st.session_state.pipeline
+    pipeline.alert_cooldown = alert_cooldown
+    st.session_state.detector.confidence_threshold = confidence_threshold
+    st.session_state.motion_analyzer.sensitivity = motion_sensitivity
+    pipeline.activity_classifier.sensitivity = motion_sensitivity
+    st.session_state.alert_system.sensitivity = motion_sensitivity
+    return pipeline
+
+def latest_result(copy_frames=True):
+    pipeline = st.session_state.pipeline
+    if pipeline is None:
+        return None, None
+    return pipeline, pipeline.latest_result(copy_frames)
+
+# Fast panels: rerun on their own at the video refresh rate, without the rest of the page
+@st.fragment(run_every=UI_CONFIG["refresh_rate"])
+def video_panel():
+    pipeline, result = latest_result()
+    if result is None:
+        if pipeline is not None and pipeline.last_error:
+            st.warning(f"⚠️ {pipeline.last_error}")
+        else:
+            st.info("⏳ Waiting for first processed frame...")
         return
-    
-    # Read frame
-    ret, frame = cap.read()
-    
-    if not ret:
-        st.warning("⚠️ No frame received from camera")
+    st.image(annotate_frame(result, st.session_state.frame_rotation),
+             use_container_width=True, channels="RGB")
+
+@st.fragment(run_every=UI_CONFIG["refresh_rate"])
+def activity_panel():
+    pipeline, result = latest_result(copy_frames=False)
+    if result is None:
         return
-    
-    # Apply rotation if needed
-    if st.session_state.frame_rotation != 0:
-        frame = rotate_frame(frame, st.session_state.frame_rotation)
-    
-    # Process frame for display
-    display_frame = cv2.resize(frame, (640, 480))
-    
-    # Detect humans
-    human_present, human_confidence, human_bboxes = st.session_state.detector.detect_humans(frame)
-    
-    # Draw bounding boxes
-    for (x, y, w, h) in human_bboxes:
-        cv2.rectangle(display_frame, (x, y), (x+w, y+h), (0, 255, 0), 3)
-        cv2.putText(display_frame, "HUMAN", (x, y-10), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-    
-    # Add overlay info
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cv2.putText(display_frame, timestamp, (10, 30), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-    
-    info_text = f"Humans: {len(human_bboxes)} | Frame: {st.session_state.frame_count}"
-    cv2.putText(display_frame, info_text, (10, 60), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-    
-    # Add orientation indicator
-    if st.session_state.frame_rotation != 0:
-        rotation_text = f"Rotated: {st.session_state.frame_rotation}°"
-        cv2.putText(display_frame, rotation_text, (10, 90), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-    
-    # Convert for display
-    display_frame_rgb = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-    
-    # FIX: Update video container without reloading
-    with video_container:
-        st.image(display_frame_rgb, use_container_width=True, channels="RGB")
-    
-    # Analyze motion if humans detected
-    if human_present and len(human_bboxes) > 0:
-        activity, motion_level, confidence = st.session_state.motion_analyzer.analyze_motion(frame, human_bboxes)
-        
-        # Check for alerts
-        if st.session_state.alert_system.should_alert(activity, motion_level, alert_cooldown):
-            alert_data = st.session_state.alert_system.add_alert(activity, motion_level, confidence)
-    else:
-        activity = "no_humans"
-        motion_level = 0.0
-        confidence = "no_confidence"
-    
-    # Update activity display - FIXED: Use container to prevent reloading
-    with activity_container:
-        if activity == "no_humans":
-            activity_html = f"""
-            <div class="alert-box alert-info">
-                <div style="display: flex; align-items: center; justify-content: center; gap: 0.5rem;">
-                    <span>🚫</span>
-                    <span>NO HUMANS DETECTED</span>
-                </div>
-                <div style="font-size: 0.9rem; margin-top: 0.5rem; opacity: 0.8;">
-                    Monitoring background activity
-                </div>
-            </div>
-            """
-        elif activity == "running":
-            activity_html = f"""
-            <div class="alert-box alert-danger">
-                <div style="display: flex; align-items: center; justify-content: center; gap: 0.5rem;">
-                    <span>🚨</span>
-                    <span>RUNNING DETECTED!</span>
-                </div>
-                <div style="font-size: 0.9rem; margin-top: 0.5rem;">
-                    Motion: {motion_level:.1%} | Confidence: {confidence.upper()}
-                </div>
-            </div>
-            """
-        else:
-            activity_html = f"""
-            <div class="alert-box alert-success">
-                <div style="display: flex; align-items: center; justify-content: center; gap: 0.5rem;">
-                    <span>✅</span>
-                    <span>{activity.upper()}</span>
-                </div>
-                <div style="font-size: 0.9rem; margin-top: 0.5rem;">
-                    Motion: {motion_level:.1%} | Confidence: {confidence.upper()}
-                </div>
-            </div>
-            """
-        
-        st.markdown(activity_html, unsafe_allow_html=True)
-    
-    # Update status - FIXED: Use container
-    with status_container:
-        status_html = f"""
-        <div style="margin: 1rem 0;">
-            <div class="status-indicator {'status-active' if st.session_state.monitoring else 'status-inactive'}" style="margin-bottom: 1rem;">
-                {'✅ ACTIVE MONITORING' if st.session_state.monitoring else '❌ SYSTEM READY'}
-            </div>
-            
-            <div style="background: rgba(30, 41, 59, 0.6); padding: 1rem; border-radius: 8px; border: 1px solid rgba(255,255,255,0.1);">
-                <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 0.5rem; font-size: 0.9rem;">
-                    <div style="color: var(--gray);">Camera:</div>
-                    <div style="font-weight: 600;">{camera_type}</div>
-                    
-                    <div style="color: var(--gray);">Humans:</div>
-                    <div style="font-weight: 600; color: {'var(--success)' if len(human_bboxes) > 0 else 'var(--gray)'};">
-                        {len(human_bboxes)}
-                    </div>
-                    
-                    <div style="color: var(--gray);">Confidence:</div>
-                    <div style="font-weight: 600;">{human_confidence:.1%}</div>
-                    
-                    <div style="color: var(--gray);">Activity:</div>
-                    <div style="font-weight: 600; color: {'var(--danger)' if activity == 'running' else 'var(--success)'};">
-                        {activity}
-                    </div>
-                </div>
-            </div>
-            
-            <div style="margin-top: 1rem; font-size: 0.8rem; color: var(--gray); text-align: center;">
-                Last update: {datetime.now().strftime("%H:%M:%S")}
-            </div>
-        </div>
-        """
-        
-        st.markdown(status_html, unsafe_allow_html=True)
-    
-    # Update alerts - FIXED: Use container
-    with alerts_container:
-        recent_alerts = st.session_state.alert_system.get_recent_alerts(5)
-        if recent_alerts:
-            alerts_html = "<div style='max-height: 300px; overflow-y: auto;'>"
-            for alert in recent_alerts:
-                alert_type = "alert-danger" if alert["type"] == "danger" else "alert-warning"
-                time_ago = "Just now"  # You can calculate actual time difference here
-                alerts_html += f"""
-                <div class="alert-box {alert_type}" style="margin: 0.5rem 0; padding: 0.75rem; font-size: 0.9rem;">
-                    <div style="display: flex; justify-content: between; align-items: start;">
-                        <div style="flex: 1;">
-                            <strong>{alert['activity'].upper()}</strong><br>
-                            <span style="font-size: 0.8rem; opacity: 0.8;">
-                                Motion: {alert['motion_level']:.1%} • {alert['timestamp']}
-                            </span>
-                        </div>
-                    </div>
-                </div>
-                """
-            alerts_html += "</div>"
-        else:
-            alerts_html = """
-            <div class="alert-box alert-info">
-                <div style="text-align: center; padding: 1rem;">
-                    <div style="font-size: 2rem; margin-bottom: 0.5rem;">📝</div>
-                    <div>No alerts yet</div>
-                    <div style="font-size: 0.8rem; opacity: 0.7; margin-top: 0.5rem;">
-                        System monitoring normally
-                    </div>
-                </div>
-            </div>
-            """
-        
-        st.markdown(alerts_html, unsafe_allow_html=True)
-    
-    # Update stats
-    st.session_state.frame_count += 1
-    
-    # Update JavaScript for real-time stats
-    st.markdown(f"""
-    <script>
-        document.getElementById('frame-count').innerText = '{st.session_state.frame_count}';
-        document.getElementById('human-count').innerText = '{len(human_bboxes)}';
-        document.getElementById('alert-count').innerText = '{len(st.session_state.alert_system.alerts)}';
-        document.getElementById('uptime').innerText = '{st.session_state.frame_count // 10}s';
-    </script>
-    """, unsafe_allow_html=True)
+    key = (result["activity"], round(result["motion_level"], 3), result["confidence"])
+    render_cached("activity", key, lambda: activity_html(*key))
+
+@st.fragment(run_every=UI_CONFIG["refresh_rate"])
+def status_panel(camera_type):
+    pipeline, result = latest_result(copy_frames=False)
+    if result is None:
+        return
+    gate = (pipeline.gate.frames_inferred, pipeline.gate.frames_skipped, pipeline.gate.skip_ratio)
+    rates = (round(pipeline.capture_fps, 1), round(pipeline.processed_fps, 1), pipeline.frames_dropped)
+    key = (camera_type, len(result["human_bboxes"]), round(result["human_confidence"], 3),
+           result["activity"], gate[:2], rates, datetime.now().strftime("%H:%M:%S"))
+    render_cached("status", key, lambda: status_html(key[0], key[1], key[2], key[3], gate, rates, key[6]))
+
+# Slow panels: alert history and counters change rarely
+@st.fragment(run_every=UI_CONFIG["slow_refresh_rate"])
+def alerts_panel():
+    alert_system = st.session_state.alert_system
+    # Key and HTML come from the same query, so alerts still queued for the store writer show up once written
+    recent = alert_system.get_recent_alerts(5)
+    total = len(alert_system.alerts)
+    key = (total, tuple(alert["ts"] for alert in recent))
+    render_cached("alerts", key, lambda: alerts_html(recent, total))
+
+@st.fragment(run_every=UI_CONFIG["slow_refresh_rate"])
+def stats_panel():
+    pipeline, result = latest_result(copy_frames=False)
+    frames = pipeline.frames_processed if pipeline is not None else 0
+    humans = len(result["human_bboxes"]) if result is not None else 0
+    st.session_state.frame_count = frames
+    uptime = int(pipeline.uptime) if pipeline is not None else 0
+    key = (frames, humans, len(st.session_state.alert_system.alerts), uptime)
+    render_cached("stats", key, lambda: stats_html(*key))
+
+@st.fragment(run_every=UI_CONFIG["slow_refresh_rate"])
+def metrics_panel():
+    pipeline = st.session_state.pipeline
+    if pipeline is None:
+        return
+    quantiles = pipeline.metrics.stage_quantiles()
+    key = tuple((stage, tuple(round((v or 0) * 1000, 1) for v in values)) for stage, values in quantiles.items())
+    server = get_metrics_server()
+    report = LOAD_REPORTS.get(get_detection_backend().name)
+    footer = f"RSS {rss_bytes() / 2**20:.0f} MiB"
+    if report is not None:
+        footer = (f"Model {report['backend']} loaded in {report['load_s']:.1f} s "
+                  f"(warmup {report['warmup_s'] * 1000:.0f} ms) · {footer}")
+    render_cached("metrics", (key, footer),
+                  lambda: metrics_html(key, server.url if server is not None else None, footer))
 
 # Run monitoring if active
 if st.session_state.monitoring:
-    main_monitoring_loop()
-    time.sleep(UI_CONFIG["refresh_rate"])
-    st.rerun()
+    pipeline = start_pipeline(camera_type, ip_url, alert_cooldown, confidence_threshold, motion_sensitivity)
+    if pipeline is not None:
+        with video_container:
+            streamer = get_streamer()
+            if streamer is not None:
+                # Rendered once per full run; the browser keeps its MJPEG connection
+                st.markdown(f'<img src="{streamer.url(st.session_state.stream_key)}" style="width: 100%; border-radius: 8px;">',
+                            unsafe_allow_html=True)
+            else:
+                video_panel()
+        with activity_container:
+            activity_panel()
+        with status_container:
+            status_panel(camera_type)
+        with alerts_container:
+            alerts_panel()
+        with stats_container:
+            stats_panel()
+        with metrics_container:
+            get_metrics_server()
+            metrics_panel()
 else:
+    with stats_container:
+        st.markdown(stats_html(st.session_state.frame_count, 0, len(st.session_state.alert_system.alerts), 0),
+                    unsafe_allow_html=True)
+    
     # Welcome screen when not monitoring
     st.markdown("""
     <div class="dashboard-card fade-in">
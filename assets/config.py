@@ -14,7 +14,18 @@ APP_CONFIG = {
 # Camera Configuration
 CAMERA_CONFIG = {
     "webcam_index": 0,
-    "ip_camera_timeout": 5,
+    "ip_camera_timeout": 5,  # Open/read timeout for stream URLs (seconds)
+    "read_timeout": 1.0,  # How long read() waits for a new frame
+    "stale_timeout": 5.0,  # No frames for this long counts as a dropped stream
+    "reconnect_backoff": 0.5,  # First reconnect delay, doubled per failed attempt
+    "max_reconnect_backoff": 30.0,
+    "test_timeout": 5.0,  # TEST CAMERA gives up after this long without a frame
+    # Decode cost control for live cameras: fps 0 decodes every frame, scale 2/4/8
+    # decodes MJPEG-over-HTTP at reduced resolution, threads 0 keeps the backend
+    # default, hw asks FFmpeg for hardware decoding where available
+    "decode": {"fps": 0, "scale": 1, "threads": 0, "hw": False},
+    # Per-camera overrides of "decode", keyed by camera name, e.g. {"gate-4k": {"fps": 10, "scale": 4}}
+    "decode_overrides": {},
     "frame_width": 640,
     "frame_height": 480,
     "rotation_angles": [0, 90, 180, 270]
@@ -23,24 +34,165 @@ CAMERA_CONFIG = {
 # Detection Configuration
 DETECTION_CONFIG = {
     "min_human_confidence": 0.5,
+    # Upper bound of each activity's (smoothed) motion level; above the last one is "running"
     "motion_thresholds": {
         "standing": 0.001,
+        "talking": 0.005,
         "walking": 0.015,
-        "running": 0.03
+        "walking_fast": 0.03,
+        "possible_running": 0.06
     },
-    "alert_cooldown": 60
+    "motion_window": 10,
+    # Per-person activity from a sliding window of tracked motion
+    "activity": {
+        "window": 15,
+        "min_samples": 5,
+        # Upper bound of median speed in body heights per second
+        "speed_thresholds": {
+            "standing": 0.15,
+            "walking": 1.0,
+            "walking_fast": 1.8
+        },
+        # Running also needs this much foreground inside the box (limbs moving)
+        "running_min_motion": 0.15
+    },
+    "alert_cooldown": 60,
+    # MotionAnalyzer background model scale. MOG2 dominates its cost: 0.5 is about
+    # 2x faster than the full-frame code, 1.0 (exact full resolution) is slightly slower
+    "motion_scale": 0.5,
+    # Inference backend: torch, onnx, onnx_int8, openvino or openvino_int8
+    "backend": "torch",
+    "model_paths": {
+        "torch": "yolov8n.pt",
+        "onnx": "yolov8n.onnx",
+        "onnx_int8": "yolov8n_int8.onnx",
+        "openvino": "yolov8n_openvino_model",
+        "openvino_int8": "yolov8n_int8_openvino_model"
+    },
+    "imgsz": 640,
+    "nms_iou": 0.7,
+    # Adaptive cadence: full detection every N frames, optical flow in between
+    "detect_every_n": 5,
+    "min_tracker_confidence": 0.6,
+    "motion_trigger": 0.02,
+    # Motion gate: skip YOLO while a downscaled MOG2 sees a static scene
+    "motion_gate": {
+        "width": 160,
+        "min_foreground": 0.002,
+        "keepalive": 2.0
+    },
+    # Multi-object tracker (ByteTrack-style)
+    "tracker": {
+        "capacity": 128,
+        "high_threshold": 0.5,
+        "low_threshold": 0.1,
+        "match_iou": 0.2,
+        "max_misses": 30
+    },
+    # Batched multi-stream inference
+    "batch_max_size": 8,
+    "batch_max_wait": 0.01
 }
 
 # Alert Configuration
 ALERT_CONFIG = {
     "suspicious_activities": ["running", "fighting", "falling"],
+    # Optional frame-level motion floor for alerts, scaled by sensitivity like the activity thresholds
+    # (0: the classified activity alone decides; one person rarely moves 3% of the frame)
+    "min_motion": 0.0,
     "email_enabled": False,
-    "sound_enabled": True
+    "sound_enabled": True,
+    # Notification channels (credentials come from .env: EMAIL_USER, EMAIL_PASSWORD, ADMIN_EMAIL)
+    "smtp_host": os.getenv("SMTP_HOST", "smtp.gmail.com"),
+    "smtp_port": int(os.getenv("SMTP_PORT", "587")),
+    "smtp_tls": True,
+    "webhook_url": os.getenv("ALERT_WEBHOOK_URL"),
+    "dispatch": {
+        "batch_window": 2.0,
+        "max_batch": 50,
+        "max_retries": 3,
+        "retry_backoff": 1.0,
+        "concurrency": 2
+    },
+    # Footage around each alert, kept as JPEGs in a byte-capped ring
+    "clips": {
+        "enabled": True,
+        "dir": "clips",
+        "pre_seconds": 5.0,
+        "post_seconds": 5.0,
+        "max_bytes": 64 * 1024 * 1024,
+        "jpeg_quality": 80
+    },
+    # Persistent alert history
+    "db_path": "alerts.db",
+    "db_batch_size": 100,
+    "db_flush_interval": 0.5
+}
+
+# Multi-camera supervisor Configuration
+SUPERVISOR_CONFIG = {
+    "pin_cores": True,
+    "max_restarts": None,
+    "restart_backoff": 1.0,
+    "max_restart_backoff": 60.0
 }
 
 # UI Configuration
 UI_CONFIG = {
     "theme": "dark",
     "refresh_rate": 0.1,
+    # Alert history and counters update less often than the live panels
+    "slow_refresh_rate": 1.0,
+    # A session's pipeline, camera and feed stop after this many seconds without the
+    # dashboard polling it (tab closed without STOP); hidden tabs may poll only once a minute
+    "idle_timeout": 180,
+    # MJPEG endpoint the dashboard embeds for live video: bind address and port
+    "stream_host": os.getenv("STREAM_HOST", "localhost"),
+    "stream_port": 8765,
+    # Base URL browsers load the stream from (default: http://stream_host:stream_port). Set it when
+    # viewers are on other machines, e.g. "http://cctv-box:8765" or "/mjpeg" behind a reverse proxy
+    "stream_public_url": os.getenv("STREAM_PUBLIC_URL"),
+    "stream_quality": 80,
+    "stream_max_fps": 15,
     "max_alerts_display": 10
 }
+
+# Prometheus-format metrics endpoint (http://host:port/metrics)
+METRICS_CONFIG = {
+    "enabled": True,
+    "host": "localhost",
+    "port": 9108
+}
+
+# Opt-in sampling profiler (MonitoringPipeline.profile / SIGUSR1 in headless mode)
+PROFILER_CONFIG = {
+    "frames": 300,
+    "interval": 0.005,
+    "dir": "profiles"
+}
+
+# Benchmark suite (scripts/bench_pipeline.py)
+BENCHMARK_CONFIG = {
+    "resolutions": [(640, 480), (1280, 720), (1920, 1080)],
+    "people": [1, 10, 50],
+    "frames": 60,
+    # p95 latency budgets in ms per resolution and stage; stages without one are not checked
+    "budgets": {
+        "640x480": {"rotate": 2, "preprocess": 5, "gate": 5, "motion": 20, "tracker": 5,
+                    "activity": 5, "alerts": 1, "annotate": 5},
+        "1920x1080": {"rotate": 10, "preprocess": 15, "gate": 10, "motion": 100, "tracker": 5,
+                      "activity": 5, "alerts": 1, "annotate": 15}
+    },
+    # Allowed p95 growth over a --baseline report
+    "max_regression": 0.25
+}
+
+# Offline analysis of recorded footage (scripts/analyze_video.py)
+OFFLINE_CONFIG = {
+    "chunk_seconds": 60,
+    # Footage replayed before each chunk (not written) so MOG2, the tracker and
+    # activity windows start warm instead of flagging the whole scene as motion
+    "warmup_seconds": 2.0,
+    "workers": None,  # None: one per available core
+    "format": "auto"  # "parquet" (needs pyarrow), "npz" or "auto"
+}
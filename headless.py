@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import sys
+
+# Add paths
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from assets.config import ALERT_CONFIG, METRICS_CONFIG
+from utils.runner import HeadlessRunner
+from utils.supervisor import CameraSupervisor
+from utils.notify import AlertDispatcher, build_channels
+from utils.metrics import MetricsServer
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run human detection and motion analysis without the Streamlit UI"
+    )
+    parser.add_argument("sources", nargs="+",
+                        help="Webcam index, video file or camera stream URL; several sources "
+                             "run in separate worker processes and only alerts are written")
+    parser.add_argument("-o", "--output", help="Write JSON lines here (default: stdout)")
+    parser.add_argument("--camera-id", help="Camera name used in results (default: source, without credentials; single source only)")
+    parser.add_argument("--no-pin", action="store_true", help="Do not pin camera workers to cores")
+    parser.add_argument("--rotation", type=int, default=0, choices=[0, 90, 180, 270],
+                        help="Rotate frames before analysis")
+    parser.add_argument("--cooldown", type=float, help="Seconds between alerts")
+    parser.add_argument("--max-frames", type=int, help="Stop after this many processed frames (single source only)")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_CONFIG["port"],
+                        help="Serve Prometheus metrics on this port (camera workers use the next ports)")
+    parser.add_argument("--no-metrics", action="store_true", help="Do not serve metrics")
+    parser.add_argument("--decode-fps", type=float,
+                        help="Decode at most this many frames/s from live cameras (others are only grabbed)")
+    parser.add_argument("--decode-scale", type=int, choices=[1, 2, 4, 8],
+                        help="Decode MJPEG-over-HTTP cameras at 1/N resolution")
+    parser.add_argument("--profile", type=int, metavar="N",
+                        help="Profile the first N frames (send SIGUSR1 to profile later ones)")
+    args = parser.parse_args(argv)
+    if len(args.sources) > 1:
+        # Camera workers are named cam0, cam1, ... and only report alerts, not frames
+        for flag, value in (("--camera-id", args.camera_id), ("--max-frames", args.max_frames)):
+            if value is not None:
+                parser.error(f"{flag} needs a single source (use --duration with several)")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    channels = build_channels()
+    dispatcher = AlertDispatcher(channels) if channels else None
+
+    metrics_port = None if args.no_metrics or not METRICS_CONFIG["enabled"] else args.metrics_port
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        if len(args.sources) > 1:
+            cameras = {f"cam{i}": source for i, source in enumerate(args.sources)}
+            decode = {"decode_fps": args.decode_fps, "decode_scale": args.decode_scale}
+            supervisor = CameraSupervisor(
+                cameras,
+                pin_cores=False if args.no_pin else None,
+                alert_cooldown=args.cooldown,
+                metrics_port=metrics_port,
+                decode={camera_id: decode for camera_id in cameras},
+                rotation=args.rotation,
+                profile_frames=args.profile
+            )
+
+            def on_alert(alert):
+                output.write(json.dumps(alert) + "\n")
+                output.flush()
+                if dispatcher is not None and alert["activity"] in ALERT_CONFIG["suspicious_activities"]:
+                    dispatcher.dispatch(alert)
+
+            summary = supervisor.run(on_alert, duration=args.duration)
+        else:
+            if metrics_port is not None:
+                MetricsServer(port=metrics_port).start()
+            runner = HeadlessRunner(
+                args.sources[0],
+                output=output,
+                camera_id=args.camera_id,
+                alert_cooldown=args.cooldown,
+                max_frames=args.max_frames,
+                rotation=args.rotation,
+                dispatcher=dispatcher,
+                profile_frames=args.profile,
+                decode_fps=args.decode_fps,
+                decode_scale=args.decode_scale
+            )
+            summary = runner.run(duration=args.duration)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if dispatcher is not None:
+            dispatcher.stop()
+
+    # Summary goes to stderr so stdout stays a clean JSON-lines stream
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
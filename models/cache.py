@@ -0,0 +1,71 @@
+import sys
+import threading
+import time
+
+import numpy as np
+
+from assets.config import DETECTION_CONFIG
+from utils.metrics import REGISTRY, rss_bytes
+
+_backends = {}
+_lock = threading.Lock()
+
+# Per backend: import + load and warmup seconds, resident memory before/after
+LOAD_REPORTS = {}
+
+
+class SharedBackend:
+    """One loaded model shared by every session, camera and thread in the process
+
+    Model runtimes keep per-call state (ultralytics predictors, OpenVINO
+    infer requests), so predictions are serialized; callers keep their own
+    thresholds and smoothing in HumanDetector.
+    """
+
+    def __init__(self, backend, name):
+        self.backend = backend
+        self.name = name
+        self._lock = threading.Lock()
+
+    def predict(self, frames, conf):
+        with self._lock:
+            return self.backend.predict(frames, conf)
+
+    def warmup(self, imgsz=None):
+        """One inference on a blank frame so the first real frame skips lazy init"""
+        imgsz = imgsz or DETECTION_CONFIG["imgsz"]
+        self.predict([np.zeros((imgsz, imgsz, 3), np.uint8)], 1.0)
+
+
+def shared_backend(name=None, warmup=True):
+    """Process-wide backend for name, loaded (and warmed up) on first use only"""
+    name = name or DETECTION_CONFIG["backend"]
+    with _lock:
+        backend = _backends.get(name)
+        if backend is not None:
+            return backend
+
+        # Heavy runtimes (torch/ultralytics, onnxruntime, openvino) are imported here
+        from utils.detection import create_backend
+
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        backend = SharedBackend(create_backend(name), name)
+        loaded = time.perf_counter()
+        if warmup:
+            backend.warmup()
+        report = {
+            "backend": name,
+            "load_s": round(loaded - start, 3),
+            "warmup_s": round(time.perf_counter() - loaded, 3),
+            "rss_before_mib": round(rss_before / 2**20, 1),
+            "rss_after_mib": round(rss_bytes() / 2**20, 1),
+        }
+        LOAD_REPORTS[name] = report
+        REGISTRY.gauge("cctv_model_load_seconds", lambda: report["load_s"] + report["warmup_s"],
+                       "Time to load and warm up the detection model", backend=name)
+        print(f"Loaded {name} model in {report['load_s']:.2f} s (warmup {report['warmup_s']:.2f} s), "
+              f"RSS {report['rss_before_mib']} -> {report['rss_after_mib']} MiB", file=sys.stderr)
+
+        _backends[name] = backend
+        return backend
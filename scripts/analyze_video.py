@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets.config import OFFLINE_CONFIG
+from utils.offline import analyze_video, write_columns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analyze a recorded video in parallel chunks and write per-frame results as columns")
+    parser.add_argument("video", help="Video file to analyze")
+    parser.add_argument("-o", "--output", help="Output path (default: next to the video); .parquet files "
+                                               "when pyarrow is installed, else one .npz")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    parser.add_argument("--chunk-seconds", type=float, help="Footage per chunk (default: split evenly "
+                                                            "over the workers, at most "
+                                                            f"{OFFLINE_CONFIG['chunk_seconds']} s)")
+    parser.add_argument("--warmup-seconds", type=float, default=OFFLINE_CONFIG["warmup_seconds"],
+                        help="Footage replayed before each chunk to warm up background models")
+    parser.add_argument("--rotation", type=int, default=0, choices=[0, 90, 180, 270])
+    parser.add_argument("--format", choices=["auto", "parquet", "npz"], default=OFFLINE_CONFIG["format"])
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    frames, detections = analyze_video(
+        args.video,
+        workers=args.workers,
+        chunk_seconds=args.chunk_seconds,
+        warmup_seconds=args.warmup_seconds,
+        rotation=args.rotation,
+        on_chunk=lambda done, total: print(f"Chunk {done}/{total} done", file=sys.stderr)
+    )
+    elapsed = time.perf_counter() - start
+
+    output = args.output or os.path.splitext(args.video)[0] + "_analysis"
+    paths = write_columns(output, frames, detections, args.format)
+
+    footage = float(frames["time"][-1]) if len(frames["time"]) else 0.0
+    print(json.dumps({
+        "video": args.video,
+        "frames": len(frames["frame"]),
+        "detections": len(detections["frame"]),
+        "footage_s": round(footage, 1),
+        "elapsed_s": round(elapsed, 1),
+        "speed_x_realtime": round(footage / elapsed, 1) if elapsed > 0 else None,
+        "outputs": paths,
+    }), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Add paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets.config import BENCHMARK_CONFIG, CAMERA_CONFIG
+from utils.activity import ActivityClassifier
+from utils.alerts import AlertSystem
+from utils.cadence import AdaptiveDetector
+from utils.gate import MotionGate
+from utils.motion import MotionAnalyzer
+from utils.pipeline import MonitoringPipeline
+from utils.preprocess import FramePreprocessor, rotate_frame
+from utils.stream import annotate_frame
+from utils.synthetic import synthetic_scene, write_clip
+from utils.tracker import ByteTracker
+
+# Warm-up frames excluded from the statistics (buffer allocation, MOG2 start-up)
+WARMUP = 5
+
+
+class GroundTruthDetector:
+    """Stands in for YOLO with the synthetic scene's true boxes
+
+    Measures everything except inference when no model backend is installed.
+    """
+
+    def __init__(self, truth):
+        self.truth = truth
+        self.index = 0
+        self.last_scores = []
+
+    def detect_humans(self, frame):
+        bboxes = self.truth[self.index % len(self.truth)] if self.truth else []
+        self.index += 1
+        self.last_scores = [0.9] * len(bboxes)
+        return len(bboxes) > 0, 0.9 if bboxes else 0, bboxes
+
+
+def make_detector(kind, truth):
+    """(detector, description); 'auto' uses YOLO when it can be loaded"""
+    if kind == "truth":
+        return GroundTruthDetector(truth), "truth"
+    try:
+        from utils.detection import HumanDetector
+        return HumanDetector(), "yolo"
+    except Exception as e:
+        if kind == "yolo":
+            raise
+        return GroundTruthDetector(truth), f"truth (yolo unavailable: {e})"
+
+
+def summarize(times, peaks=None):
+    times = np.asarray(times[WARMUP:] or times) * 1000
+    summary = {
+        "p50_ms": round(float(np.percentile(times, 50)), 3),
+        "p95_ms": round(float(np.percentile(times, 95)), 3),
+        "fps": round(float(1000 / times.mean()), 1) if times.mean() > 0 else None,
+    }
+    if peaks is not None:
+        summary["peak_kib"] = round(float(np.max(peaks[WARMUP:] or peaks)) / 1024, 1)
+    return summary
+
+
+def bench_stages(scene, truth, detector_kind, rotation, trace_memory):
+    """Time every stage in isolation on the same frames, returns {stage: [seconds]}"""
+    detector, _ = make_detector(detector_kind, truth)
+    preprocess = FramePreprocessor(rotation, display_size=(CAMERA_CONFIG["frame_width"],
+                                                           CAMERA_CONFIG["frame_height"]))
+    gate = MotionGate()
+    motion = MotionAnalyzer()
+    tracker = ByteTracker()
+    classifier = ActivityClassifier()
+    alerts = AlertSystem()
+
+    times = {}
+    peaks = {}
+
+    def timed(stage, fn, *args):
+        if trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = fn(*args)
+        times.setdefault(stage, []).append(time.perf_counter() - start)
+        if trace_memory:
+            peaks.setdefault(stage, []).append(tracemalloc.get_traced_memory()[1] - before)
+        return result
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        for i, frame in enumerate(scene):
+            timed("rotate", rotate_frame, frame, rotation or 180)
+            packet = timed("preprocess", preprocess, frame)
+            timed("gate", gate.check, frame)
+            _, _, bboxes = timed("detect", detector.detect_humans, frame)
+            activity, motion_level, _ = timed("motion", motion.analyze_motion, frame, bboxes)
+            track_ids = timed("tracker", tracker.update, bboxes, getattr(detector, "last_scores", None))
+            timed("activity", classifier.update, track_ids, bboxes, motion.last_box_motion, i / 30)
+
+            def alert_step():
+                if alerts.should_alert(activity, motion_level, 0):
+                    alerts.add_alert(activity, motion_level, "high")
+            timed("alerts", alert_step)
+
+            result = dict(packet, human_bboxes=bboxes, track_ids=track_ids,
+                          captured_at=time.time(), frame_id=i)
+            timed("annotate", annotate_frame, result, rotation)
+            preprocess.release(packet)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return times, peaks
+
+
+def bench_pipeline(width, height, people, frames, detector_kind, rotation):
+    """Run the full threaded pipeline over a synthetic clip file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "clip.mp4")
+        truth = write_clip(path, width, height, people, frames)
+        detector, _ = make_detector(detector_kind, truth)
+
+        latencies = []
+        cap = cv2.VideoCapture(path)
+        pipeline = MonitoringPipeline(
+            cap, AdaptiveDetector(detector), MotionAnalyzer(), AlertSystem(),
+            preprocess=FramePreprocessor(rotation) if rotation else None,
+            drop_frames=False, stop_at_end=True,
+            on_result=lambda result: latencies.append(result["latency"]),
+            gate=MotionGate(), tracker=ByteTracker(), activity_classifier=ActivityClassifier()
+        )
+        start = time.perf_counter()
+        pipeline.start()
+        pipeline.wait(timeout=max(60, frames))
+        elapsed = time.perf_counter() - start
+        pipeline.stop()
+        cap.release()
+
+    summary = summarize(latencies)
+    summary["fps"] = round(pipeline.frames_processed / elapsed, 1) if elapsed > 0 else None
+    summary["frames"] = pipeline.frames_processed
+    return summary
+
+
+def check(results, budgets, baseline, max_regression):
+    """List of human-readable failures against budgets and a baseline report"""
+    failures = []
+    previous = {}
+    if baseline:
+        previous = {(r["stage"], r["resolution"], r["people"]): r for r in baseline["results"]}
+
+    for r in results:
+        budget = budgets.get(r["resolution"], {}).get(r["stage"])
+        if budget is not None and r["p95_ms"] > budget:
+            failures.append(f"{r['stage']} @ {r['resolution']}, {r['people']} people: "
+                            f"p95 {r['p95_ms']:.2f} ms > budget {budget} ms")
+        old = previous.get((r["stage"], r["resolution"], r["people"]))
+        if old is not None and r["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            failures.append(f"{r['stage']} @ {r['resolution']}, {r['people']} people: "
+                            f"p95 {r['p95_ms']:.2f} ms vs baseline {old['p95_ms']:.2f} ms "
+                            f"(> +{max_regression:.0%})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage and the full pipeline")
+    parser.add_argument("--resolutions", nargs="+",
+                        default=[f"{w}x{h}" for w, h in BENCHMARK_CONFIG["resolutions"]])
+    parser.add_argument("--people", nargs="+", type=int, default=BENCHMARK_CONFIG["people"])
+    parser.add_argument("--frames", type=int, default=BENCHMARK_CONFIG["frames"])
+    parser.add_argument("--rotation", type=int, default=0, choices=[0, 90, 180, 270])
+    parser.add_argument("--detector", choices=["auto", "yolo", "truth"], default="auto",
+                        help="'truth' replays the synthetic boxes instead of running YOLO")
+    parser.add_argument("--no-pipeline", action="store_true", help="Only time stages in isolation")
+    parser.add_argument("-o", "--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=BENCHMARK_CONFIG["max_regression"])
+    args = parser.parse_args(argv)
+
+    _, detector_name = make_detector(args.detector, [])
+    results = []
+    for resolution in args.resolutions:
+        width, height = (int(v) for v in resolution.split("x"))
+        for people in args.people:
+            first = len(results)
+            truth_scene = list(synthetic_scene(width, height, people, args.frames))
+            scene = [frame for frame, _ in truth_scene]
+            truth = [bboxes for _, bboxes in truth_scene]
+
+            times, _ = bench_stages(scene, truth, args.detector, args.rotation, trace_memory=False)
+            _, peaks = bench_stages(scene, truth, args.detector, args.rotation, trace_memory=True)
+            for stage in times:
+                results.append(dict(stage=stage, resolution=resolution, people=people,
+                                    **summarize(times[stage], peaks[stage])))
+            if not args.no_pipeline:
+                results.append(dict(stage="pipeline", resolution=resolution, people=people,
+                                    **bench_pipeline(width, height, people, args.frames,
+                                                     args.detector, args.rotation)))
+
+            for r in results[first:]:
+                peak = f"peak {r['peak_kib']:9.1f} KiB" if "peak_kib" in r else ""
+                print(f"{resolution:>10} {people:>4} {r['stage']:<11} p50 {r['p50_ms']:8.2f} ms  "
+                      f"p95 {r['p95_ms']:8.2f} ms  {r['fps'] or 0:8.1f} fps  {peak}", file=sys.stderr)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "detector": detector_name,
+        "frames": args.frames,
+        "rotation": args.rotation,
+        "peak_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failures = check(results, BENCHMARK_CONFIG["budgets"], baseline, args.max_regression)
+    report["failures"] = failures
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+
+import cv2
+
+# Add paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets.config import DETECTION_CONFIG
+from utils.detection import compare_detections, create_backend
+
+
+def read_frames(path, max_frames, step):
+    """Read every step-th frame of a video (or a single image)"""
+    image = cv2.imread(path)
+    if image is not None:
+        return [image]
+
+    cap = cv2.VideoCapture(path)
+    frames = []
+    index = 0
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % step == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that an exported backend finds the same people as the PyTorch model"
+    )
+    parser.add_argument("backend", choices=[name for name in DETECTION_CONFIG["model_paths"] if name != "torch"])
+    parser.add_argument("source", help="Video file or image with people in it")
+    parser.add_argument("--model", help="Override the backend's model path")
+    parser.add_argument("--max-frames", type=int, default=100)
+    parser.add_argument("--step", type=int, default=5, help="Use every N-th frame")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for two boxes to count as the same person")
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--min-precision", type=float, default=0.95)
+    args = parser.parse_args(argv)
+
+    frames = read_frames(args.source, args.max_frames, args.step)
+    if not frames:
+        print(f"No frames read from {args.source}")
+        return 2
+
+    conf = DETECTION_CONFIG["min_human_confidence"]
+    reference = create_backend("torch")
+    candidate = create_backend(args.backend, args.model)
+
+    matched = missed = extra = 0
+    iou_sum = 0.0
+    for frame in frames:
+        result = compare_detections(reference.predict([frame], conf)[0],
+                                    candidate.predict([frame], conf)[0], args.iou)
+        matched += result[0]
+        missed += result[1]
+        extra += result[2]
+        iou_sum += result[3] * result[0]
+
+    recall = matched / (matched + missed) if matched + missed else 1.0
+    precision = matched / (matched + extra) if matched + extra else 1.0
+    mean_iou = iou_sum / matched if matched else 0.0
+    print(f"{args.backend}: frames={len(frames)} matched={matched} missed={missed} extra={extra} "
+          f"recall={recall:.3f} precision={precision:.3f} mean_iou={mean_iou:.3f}")
+
+    if recall < args.min_recall or precision < args.min_precision:
+        print("FAIL: backend results diverge from PyTorch")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+import argparse
+import os
+import sys
+
+# Add paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets.config import DETECTION_CONFIG
+from utils.detection import export_model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the YOLO model for a CPU inference backend")
+    parser.add_argument("backend", choices=[name for name in DETECTION_CONFIG["model_paths"] if name != "torch"])
+    parser.add_argument("--source", help="PyTorch weights to export (default: torch model path)")
+    args = parser.parse_args(argv)
+
+    path = export_model(args.backend, args.source)
+    print(f"Exported {args.backend} model to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
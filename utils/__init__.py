@@ -1,6 +1,12 @@
 # Utils package
-from .detection import HumanDetector
+from .detection import HumanDetector, BatchedDetector
 from .motion import MotionAnalyzer
 from .alerts import AlertSystem
+from .alert_store import AlertStore
+from .pipeline import MonitoringPipeline
+from .cadence import AdaptiveDetector
+from .gate import MotionGate
+from .tracker import ByteTracker
+from .activity import ActivityClassifier
 
-__all__ = ['HumanDetector', 'MotionAnalyzer', 'AlertSystem']
+__all__ = ['HumanDetector', 'BatchedDetector', 'MotionAnalyzer', 'AlertSystem', 'AlertStore', 'MonitoringPipeline', 'AdaptiveDetector', 'MotionGate', 'ByteTracker', 'ActivityClassifier']
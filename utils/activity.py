@@ -0,0 +1,114 @@
+import numpy as np
+
+from assets.config import DETECTION_CONFIG
+from utils.motion import ACTIVITY_LEVELS, classify_level, sensitivity_factor
+
+
+class ActivityClassifier:
+    """Per-person activity decided over a sliding window of tracked motion
+
+    Every track gets a row in fixed-size ring buffers holding its recent speed
+    (body heights per second) and in-box foreground fraction. The label comes
+    from window medians, so a single noisy frame cannot flip it.
+    """
+
+    def __init__(self, capacity=None, window=None, sensitivity=5):
+        config = DETECTION_CONFIG["activity"]
+        self.capacity = capacity or DETECTION_CONFIG["tracker"]["capacity"]
+        self.window = window or config["window"]
+        self.min_samples = config["min_samples"]
+        self.speed_thresholds = config["speed_thresholds"]
+        self.running_min_motion = config["running_min_motion"]
+        self.sensitivity = sensitivity
+
+        n, w = self.capacity, self.window
+        self.speed = np.full((n, w), np.nan, np.float32)
+        self.motion = np.full((n, w), np.nan, np.float32)
+        self.samples = np.zeros(n, np.int32)
+        self.cursor = np.zeros(n, np.int32)
+        self.last_center = np.zeros((n, 2), np.float32)
+        self.last_time = np.zeros(n, np.float64)
+        self._rows = {}
+
+    def _row_for(self, track_id, center, timestamp):
+        row = self._rows.get(track_id)
+        if row is None:
+            free = np.setdiff1d(np.arange(self.capacity), list(self._rows.values()), assume_unique=True)
+            if len(free) == 0:
+                return None
+            row = int(free[0])
+            self._rows[track_id] = row
+            self.speed[row] = np.nan
+            self.motion[row] = np.nan
+            self.samples[row] = 0
+            self.cursor[row] = 0
+            self.last_center[row] = center
+            self.last_time[row] = timestamp
+        return row
+
+    def update(self, track_ids, human_bboxes, box_motion, timestamp):
+        """Add one frame of observations, returns an activity per bbox (None until decided)"""
+        activities = [None] * len(track_ids)
+        if len(track_ids) == 0:
+            self._rows.clear()
+            return activities
+
+        boxes = np.asarray(human_bboxes, dtype=np.float32).reshape(-1, 4)
+        centers = boxes[:, :2] + boxes[:, 2:] / 2
+        heights = np.maximum(boxes[:, 3], 1)
+
+        rows, index = [], []
+        for i, track_id in enumerate(track_ids):
+            if track_id < 0:
+                continue
+            row = self._row_for(track_id, centers[i], timestamp)
+            if row is not None:
+                rows.append(row)
+                index.append(i)
+
+        # Forget tracks that are no longer reported
+        live = {track_ids[i] for i in index}
+        for track_id in [t for t in self._rows if t not in live]:
+            del self._rows[track_id]
+        if not rows:
+            return activities
+
+        rows, index = np.array(rows), np.array(index)
+        dt = np.maximum(timestamp - self.last_time[rows], 1e-3)
+        displacement = np.linalg.norm(centers[index] - self.last_center[rows], axis=1)
+        fresh = self.last_time[rows] < timestamp
+
+        # Write into the ring buffers (first observation of a track has no speed yet)
+        cursor = self.cursor[rows]
+        self.speed[rows, cursor] = np.where(fresh, displacement / heights[index] / dt, np.nan)
+        self.motion[rows, cursor] = np.asarray(box_motion, dtype=np.float32)[index]
+        self.cursor[rows] = (cursor + 1) % self.window
+        self.samples[rows] = np.minimum(self.samples[rows] + 1, self.window)
+        self.last_center[rows] = centers[index]
+        self.last_time[rows] = timestamp
+
+        # Window statistics for all updated tracks at once
+        ready = self.samples[rows] >= self.min_samples
+        if not ready.any():
+            return activities
+        with np.errstate(all="ignore"):
+            speed = np.nanmedian(self.speed[rows[ready]], axis=1)
+            motion = np.nanmedian(self.motion[rows[ready]], axis=1)
+
+        running_motion = self.running_min_motion * sensitivity_factor(self.sensitivity)
+        for i, s, m in zip(index[ready], speed, motion):
+            if np.isnan(s):
+                continue
+            activity = classify_level(s, self.speed_thresholds, self.sensitivity)
+            if activity == "running" and m < running_motion:
+                activity = "walking_fast"
+            activities[i] = activity
+        return activities
+
+
+def most_alarming(activities):
+    """The most alarming decided activity, or None if none are decided yet"""
+    decided = [activity for activity in activities if activity is not None]
+    if not decided:
+        return None
+    return max(decided, key=ACTIVITY_LEVELS.index)
@@ -0,0 +1,139 @@
+import queue
+from contextlib import closing
+import sqlite3
+import sys
+import threading
+import time
+
+from assets.config import ALERT_CONFIG
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    camera_id TEXT NOT NULL,
+    activity TEXT NOT NULL,
+    motion_level REAL,
+    confidence TEXT,
+    type TEXT,
+    clip_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_activity_ts ON alerts (activity, ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_camera_ts ON alerts (camera_id, ts);
+"""
+
+COLUMNS = ("ts", "timestamp", "camera_id", "activity", "motion_level", "confidence", "type", "clip_path")
+
+
+class AlertStore:
+    """Persistent alert history in SQLite (WAL mode) with a background batch writer
+
+    append() only enqueues, so the frame loop never waits on disk; the writer
+    thread commits queued alerts in batches. Reads use per-thread connections
+    and are served from the ts/activity/camera indexes.
+    """
+
+    def __init__(self, path=None, batch_size=None, flush_interval=None):
+        self.path = path or ALERT_CONFIG["db_path"]
+        self.batch_size = batch_size or ALERT_CONFIG["db_batch_size"]
+        self.flush_interval = flush_interval or ALERT_CONFIG["db_flush_interval"]
+
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._stop_event = threading.Event()
+
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+        self._thread = threading.Thread(target=self._writer_loop, name="alert-store", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def append(self, alert):
+        """Queue an alert dict for writing, never blocks"""
+        self._queue.put(tuple(alert.get(column) for column in COLUMNS))
+
+    def flush(self, timeout=None):
+        """Wait until every queued alert has been committed"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        self.flush(timeout=5.0)
+        self._stop_event.set()
+        self._thread.join(timeout=2.0)
+
+    def _writer_loop(self):
+        conn = self._connect()
+        while not self._stop_event.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            # Gather a burst into one transaction
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                with conn:
+                    conn.executemany(
+                        f"INSERT INTO alerts ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                        batch)
+            except sqlite3.Error as e:
+                print(f"Alert store error: {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        conn.close()
+
+    def _where(self, start, end, activity, camera_id):
+        clauses, params = [], []
+        for clause, value in (("ts >= ?", start), ("ts < ?", end),
+                              ("activity = ?", activity), ("camera_id = ?", camera_id)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def recent(self, count=10, camera_id=None):
+        """Newest alerts first"""
+        return self.query(camera_id=camera_id, limit=count)
+
+    def query(self, start=None, end=None, activity=None, camera_id=None, limit=None):
+        """Alerts in [start, end) epoch seconds, optionally filtered, newest first"""
+        where, params = self._where(start, end, activity, camera_id)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM alerts{where} ORDER BY ts DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._reader().execute(sql, params)]
+
+    def count(self, start=None, end=None, activity=None, camera_id=None):
+        where, params = self._where(start, end, activity, camera_id)
+        return self._reader().execute(f"SELECT COUNT(*) FROM alerts{where}", params).fetchone()[0]
@@ -1,21 +1,35 @@
 import time
 from datetime import datetime
 
+from assets.config import ALERT_CONFIG
+from utils.motion import sensitivity_factor
+
 class AlertSystem:
-    def __init__(self):
+    def __init__(self, store=None, camera_id="default", dispatcher=None):
         self.alerts = []
         self.last_alert_time = 0
+        # Optional AlertStore for persistent, indexed history
+        self.store = store
+        # Optional AlertDispatcher for email/webhook/sound notifications
+        self.dispatcher = dispatcher
+        self.camera_id = camera_id
+        # Sidebar sensitivity (1-10) scaling the optional motion floor
+        self.sensitivity = 5
         
-    def add_alert(self, activity, motion_level, confidence):
+    def add_alert(self, activity, motion_level, confidence, camera_id=None, clip_path=None):
         """Add a new alert"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = time.time()
+        timestamp = datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
         
         alert_data = {
+            "ts": now,
             "timestamp": timestamp,
+            "camera_id": camera_id or self.camera_id,
             "activity": activity,
             "motion_level": motion_level,
             "confidence": confidence,
-            "type": "danger" if activity == "running" else "warning"
+            "type": "danger" if activity == "running" else "warning",
+            "clip_path": clip_path
         }
         
         self.alerts.insert(0, alert_data)
@@ -23,6 +37,12 @@ class AlertSystem:
         # Keep only last 20 alerts
         if len(self.alerts) > 20:
             self.alerts.pop()
+        
+        if self.store is not None:
+            self.store.append(alert_data)
+        
+        if self.dispatcher is not None and activity in ALERT_CONFIG["suspicious_activities"]:
+            self.dispatcher.dispatch(alert_data)
             
         return alert_data
     
@@ -30,7 +50,8 @@ class AlertSystem:
         """Check if alert should be triggered"""
         current_time = time.time()
         
-        if activity == "running" and motion_level > 0.03:
+        min_motion = ALERT_CONFIG["min_motion"] * sensitivity_factor(self.sensitivity)
+        if activity in ALERT_CONFIG["suspicious_activities"] and motion_level >= min_motion:
             if current_time - self.last_alert_time > cooldown:
                 self.last_alert_time = current_time
                 return True
@@ -38,5 +59,16 @@ class AlertSystem:
         return False
     
     def get_recent_alerts(self, count=10):
-        """Get recent alerts"""
+        """Get recent alerts for this system's camera"""
+        if self.store is not None:
+            return self.store.recent(count, camera_id=self.camera_id)
         return self.alerts[:count]
+    
+    def get_alerts_between(self, start, end, activity=None, camera_id=None):
+        """Alerts in [start, end) epoch seconds, newest first"""
+        if self.store is not None:
+            return self.store.query(start, end, activity=activity, camera_id=camera_id)
+        return [alert for alert in self.alerts
+                if start <= alert["ts"] < end
+                and (activity is None or alert["activity"] == activity)
+                and (camera_id is None or alert["camera_id"] == camera_id)]
@@ -0,0 +1,120 @@
+import cv2
+import numpy as np
+
+from assets.config import DETECTION_CONFIG
+
+
+class BoxPropagator:
+    """Moves bboxes between detector runs with sparse Lucas-Kanade optical flow"""
+
+    def __init__(self, grid_size=3, max_fb_error=1.0):
+        self.grid_size = grid_size
+        self.max_fb_error = max_fb_error
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        # Relative grid positions inside a box, kept away from the (background) edges
+        steps = np.linspace(0.25, 0.75, grid_size, dtype=np.float32)
+        gx, gy = np.meshgrid(steps, steps)
+        self._grid = np.stack([gx.ravel(), gy.ravel()], axis=1)
+        self.prev_gray = None
+        self.boxes = np.zeros((0, 4), np.float32)
+
+    def reset(self, gray, bboxes):
+        """Start propagating from freshly detected [x, y, w, h] bboxes"""
+        self.prev_gray = gray
+        self.boxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+
+    def propagate(self, gray):
+        """Shift and rescale the boxes into this frame, returns (bboxes, confidence)"""
+        if self.prev_gray is None or len(self.boxes) == 0:
+            self.prev_gray = gray
+            return [], 1.0
+
+        # All grid points of all boxes in one LK call
+        points = (self.boxes[:, None, :2] + self._grid[None] * self.boxes[:, None, 2:]).reshape(-1, 1, 2)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None, **self.lk_params)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, moved, None, **self.lk_params)
+
+        fb_error = np.linalg.norm((back - points).reshape(-1, 2), axis=1)
+        valid = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.max_fb_error)
+
+        per_box = self._grid.shape[0]
+        valid = valid.reshape(-1, per_box)
+        before = points.reshape(-1, per_box, 2)
+        after = moved.reshape(-1, per_box, 2)
+
+        box_confidence = valid.mean(axis=1)
+        for i in np.flatnonzero(valid.sum(axis=1) >= 2):
+            ok = valid[i]
+            shift = np.median(after[i, ok] - before[i, ok], axis=0)
+            # Scale from the change in spread of the tracked points
+            spread_before = np.std(before[i, ok], axis=0).mean()
+            spread_after = np.std(after[i, ok], axis=0).mean()
+            scale = np.clip(spread_after / spread_before, 0.8, 1.25) if spread_before > 1e-3 else 1.0
+
+            center = self.boxes[i, :2] + self.boxes[i, 2:] / 2 + shift
+            self.boxes[i, 2:] *= scale
+            self.boxes[i, :2] = center - self.boxes[i, 2:] / 2
+
+        self.prev_gray = gray
+        bboxes = np.round(self.boxes).astype(np.int32).tolist()
+        return bboxes, float(box_confidence.min())
+
+
+class AdaptiveDetector:
+    """Runs the detector every N frames and propagates boxes in between
+
+    A full detection is also forced when the propagated boxes become
+    unreliable or when the caller reports a burst of motion.
+    """
+
+    def __init__(self, detector, detect_every=None, min_tracker_confidence=None, motion_trigger=None):
+        self.detector = detector
+        self.detect_every = detect_every or DETECTION_CONFIG["detect_every_n"]
+        self.min_tracker_confidence = (min_tracker_confidence if min_tracker_confidence is not None
+                                       else DETECTION_CONFIG["min_tracker_confidence"])
+        self.motion_trigger = (motion_trigger if motion_trigger is not None
+                               else DETECTION_CONFIG["motion_trigger"])
+        self.propagator = BoxPropagator()
+
+        self.frames_detected = 0
+        self.frames_propagated = 0
+        self.tracker_confidence = 1.0
+        self.last_scores = []
+        self._since_detection = None
+        self._last_presence = 0
+
+    def force_detection(self):
+        """Run the full detector on the next frame"""
+        self._since_detection = None
+
+    def detect_humans(self, frame, motion_level=None):
+        """Same return value as HumanDetector.detect_humans"""
+        if frame is None:
+            return False, 0, []
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+        needs_detection = (
+            self.detect_every <= 1
+            or self._since_detection is None
+            or self._since_detection + 1 >= self.detect_every
+            or self.tracker_confidence < self.min_tracker_confidence
+            or (motion_level is not None and motion_level > self.motion_trigger)
+        )
+
+        if needs_detection:
+            human_present, presence_confidence, human_bboxes = self.detector.detect_humans(frame)
+            self.last_scores = getattr(self.detector, "last_scores", None)
+            self.propagator.reset(gray, human_bboxes)
+            self.tracker_confidence = 1.0
+            self._since_detection = 0
+            self._last_presence = presence_confidence
+            self.frames_detected += 1
+            return human_present, presence_confidence, human_bboxes
+
+        human_bboxes, self.tracker_confidence = self.propagator.propagate(gray)
+        self.last_scores = [self.tracker_confidence] * len(human_bboxes)
+        self._since_detection += 1
+        self.frames_propagated += 1
+        return len(human_bboxes) > 0, self._last_presence, human_bboxes
@@ -0,0 +1,322 @@
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import cv2
+import numpy as np
+
+from assets.config import CAMERA_CONFIG
+from utils.metrics import REGISTRY, RateMeter
+
+
+# cv2.imdecode flags that decode a JPEG directly at 1/scale resolution (DCT scaling)
+_REDUCED_DECODE = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def source_name(source):
+    """Name for a camera source that is safe to log, label and store
+
+    Stream URLs keep only host, port and path: RTSP/HTTP URLs often carry
+    user:password@ credentials or ?token= query strings.
+    """
+    source = str(source)
+    if "://" not in source:
+        return source
+    parts = urllib.parse.urlsplit(source)
+    host = parts.hostname or ""
+    if parts.port is not None:
+        host = f"{host}:{parts.port}"
+    return f"{host}{parts.path}".rstrip("/") or parts.scheme
+
+
+def decode_options(name):
+    """CAMERA_CONFIG["decode"] with the per-camera overrides for name applied"""
+    options = dict(CAMERA_CONFIG["decode"])
+    options.update(CAMERA_CONFIG["decode_overrides"].get(str(name), {}))
+    return options
+
+
+class MJPEGReader:
+    """cv2.VideoCapture-like reader of multipart MJPEG over HTTP (e.g. phone IP cameras)
+
+    grab() only reads the next JPEG's bytes; retrieve() decodes it at
+    1/scale resolution, which the FFmpeg backend cannot do. Raises
+    ValueError when the URL does not serve MJPEG, so callers can fall back
+    to cv2.VideoCapture.
+    """
+
+    def __init__(self, url, scale=1, timeout=None):
+        self.scale = scale if scale in _REDUCED_DECODE else 1
+        self._response = urllib.request.urlopen(url, timeout=timeout or CAMERA_CONFIG["ip_camera_timeout"])
+        if not self._response.headers.get("Content-Type", "").startswith("multipart/"):
+            self._response.close()
+            raise ValueError(f"{url} is not an MJPEG stream")
+        self._buffer = bytearray()
+        self._jpeg = None
+
+    def isOpened(self):
+        return self._response is not None
+
+    def grab(self):
+        if self._response is None:
+            return False
+        try:
+            while True:
+                start = self._buffer.find(b"\xff\xd8")
+                end = self._buffer.find(b"\xff\xd9", start + 2) if start >= 0 else -1
+                if end >= 0:
+                    self._jpeg = bytes(self._buffer[start:end + 2])
+                    del self._buffer[:end + 2]
+                    return True
+                if start > 0:
+                    del self._buffer[:start]
+                chunk = self._response.read1(65536)
+                if not chunk:
+                    return False
+                self._buffer += chunk
+        except OSError:
+            return False
+
+    def retrieve(self):
+        if self._jpeg is None:
+            return False, None
+        frame = cv2.imdecode(np.frombuffer(self._jpeg, np.uint8), _REDUCED_DECODE[self.scale])
+        return frame is not None, frame
+
+    def read(self):
+        return self.retrieve() if self.grab() else (False, None)
+
+    def get(self, prop):
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+
+class CameraStream:
+    """cv2.VideoCapture-like source that connects, drains and reconnects in the background
+
+    A reader thread opens the source (so callers never block on connect),
+    grabs frames as fast as the camera delivers them so OpenCV's internal
+    buffer never serves stale frames, and keeps only the newest one. When the
+    stream fails or goes silent for stale_timeout seconds it is reopened
+    with exponential backoff. A video file with realtime=True (and loop=True)
+    is paced at its own FPS and stands in for a live camera.
+
+    Frames beyond decode_fps are grabbed but never retrieved. With the FFmpeg
+    backend grab() already decodes, so this only saves the colour conversion
+    and copy in retrieve(); MJPEGReader sources skip decoding entirely and
+    are decoded at 1/decode_scale resolution.
+    Both default to CAMERA_CONFIG["decode"] and its per-camera overrides.
+    """
+
+    def __init__(self, source, name=None, realtime=False, loop=False, reconnect_backoff=None,
+                 max_backoff=None, stale_timeout=None, read_timeout=None, opener=None, decode_fps=None,
+                 decode_scale=None):
+        self.source = int(source) if str(source).isdigit() else source
+        self.name = str(name) if name is not None else source_name(source)
+        self.realtime = realtime
+        self.loop = loop
+        self.reconnect_backoff = reconnect_backoff or CAMERA_CONFIG["reconnect_backoff"]
+        self.max_backoff = max_backoff or CAMERA_CONFIG["max_reconnect_backoff"]
+        self.stale_timeout = stale_timeout or CAMERA_CONFIG["stale_timeout"]
+        self.read_timeout = read_timeout or CAMERA_CONFIG["read_timeout"]
+        self._opener = opener or self._open
+        self.decode = decode_options(self.name)
+        if decode_fps is not None:
+            self.decode["fps"] = decode_fps
+        if decode_scale is not None:
+            self.decode["scale"] = decode_scale
+
+        self.health = {
+            "state": "connecting",
+            "connects": 0,
+            "reconnects": 0,
+            "frames_grabbed": 0,
+            "frames_retrieved": 0,
+            "frames_skipped": 0,
+            "frames_read": 0,
+            "frames_drained": 0,
+            "connected_since": None,
+            "last_frame_at": None,
+            "last_error": None,
+            "retry_at": None,
+        }
+        self.rate = RateMeter()
+
+        self._frame = None
+        self._frame_seq = 0
+        self._read_seq = 0
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-ingest", daemon=True)
+        self._thread.start()
+
+        camera = self.name
+        REGISTRY.gauge("cctv_camera_connected", lambda: self.health["state"] == "streaming",
+                       "1 while the camera is streaming", camera=camera)
+        REGISTRY.gauge("cctv_camera_reconnects", lambda: self.health["reconnects"],
+                       "Reconnects since the stream was created", camera=camera)
+        REGISTRY.gauge("cctv_camera_fps", lambda: self.rate.rate, "Frames delivered by the camera per second",
+                       camera=camera)
+        REGISTRY.gauge("cctv_camera_decode_skipped", lambda: self.health["frames_skipped"],
+                       "Frames grabbed but never retrieved (above decode fps)", camera=camera)
+
+    def _open(self, source):
+        if isinstance(source, int):
+            cap = cv2.VideoCapture(source)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_CONFIG["frame_width"])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_CONFIG["frame_height"])
+        else:
+            if self.decode["scale"] > 1 and source.startswith(("http://", "https://")):
+                try:
+                    return MJPEGReader(source, self.decode["scale"])
+                except ValueError:
+                    pass
+            timeout_ms = int(CAMERA_CONFIG["ip_camera_timeout"] * 1000)
+            params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+            if self.decode["threads"]:
+                params += [cv2.CAP_PROP_N_THREADS, self.decode["threads"]]
+            if self.decode["hw"]:
+                params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+            cap = cv2.VideoCapture(source, cv2.CAP_ANY, params)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    @property
+    def status(self):
+        """One-line human-readable connection state"""
+        health = self.health
+        if health["state"] == "streaming":
+            return f"Streaming ({self.rate.rate:.1f} fps)"
+        if health["state"] == "reconnecting":
+            wait = max(0.0, (health["retry_at"] or 0) - time.time())
+            return f"Reconnecting in {wait:.0f}s (attempt {health['reconnects']}): {health['last_error']}"
+        if health["state"] == "stopped":
+            return "Camera stopped"
+        return "Connecting to camera..."
+
+    def isOpened(self):
+        return not self._stop_event.is_set()
+
+    def read(self, timeout=None):
+        """Newest frame not returned before, waiting up to timeout (read_timeout) seconds"""
+        timeout = self.read_timeout if timeout is None else timeout
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._frame_seq > self._read_seq
+                                            or self._stop_event.is_set(), timeout):
+                return False, None
+            if self._frame_seq <= self._read_seq:
+                return False, None
+            self.health["frames_drained"] += self._frame_seq - self._read_seq - 1
+            self._read_seq = self._frame_seq
+            self.health["frames_read"] += 1
+            return True, self._frame
+
+    def wait_frame(self, timeout):
+        """Block until the first frame arrives (True) or timeout/permanent failure (False)"""
+        ok, _ = self.read(timeout)
+        return ok
+
+    def release(self):
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        self._thread.join(timeout=2.0)
+        self.health["state"] = "stopped"
+
+    def _run(self):
+        attempt = 0
+        while not self._stop_event.is_set():
+            try:
+                cap = self._opener(self.source)
+                if cap is None or not cap.isOpened():
+                    raise ConnectionError(f"Cannot open {self.name}")
+                self.health["connects"] += 1
+                self.health["state"] = "streaming"
+                self.health["connected_since"] = time.time()
+                self.health["last_error"] = None
+                attempt = 0
+                finished = self._stream(cap)
+                cap.release()
+                if finished:
+                    # A file without loop=True simply ends
+                    self.health["state"] = "stopped"
+                    self._stop_event.set()
+                    with self._condition:
+                        self._condition.notify_all()
+                    return
+            except Exception as e:
+                self.health["last_error"] = str(e)
+
+            if self._stop_event.is_set():
+                break
+            backoff = min(self.reconnect_backoff * 2 ** attempt, self.max_backoff)
+            attempt += 1
+            self.health["reconnects"] += 1
+            self.health["state"] = "reconnecting"
+            self.health["retry_at"] = time.time() + backoff
+            self._stop_event.wait(backoff)
+
+    def _stream(self, cap):
+        """Grab until failure/stop; returns True when a non-looping file has ended"""
+        is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        interval = 0.0
+        if self.realtime and is_file:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+        decode_interval = 1.0 / self.decode["fps"] if self.decode["fps"] else 0.0
+        next_at = next_decode = time.time()
+        last_frame = time.time()
+
+        while not self._stop_event.is_set():
+            if not cap.grab():
+                if is_file:
+                    if self.loop:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    return True
+                if time.time() - last_frame > self.stale_timeout:
+                    raise ConnectionError(f"No frames from {self.name} for {self.stale_timeout:.0f}s")
+                time.sleep(0.01)
+                continue
+
+            last_frame = time.time()
+            self.health["frames_grabbed"] += 1
+            self.health["last_frame_at"] = last_frame
+            self.rate.update(self.health["frames_grabbed"], last_frame)
+
+            # Frames above the target rate are never retrieved (FFmpeg has still decoded them in grab())
+            if last_frame < next_decode:
+                self.health["frames_skipped"] += 1
+            else:
+                # Keep the cadence without building up a backlog after a stall
+                next_decode = max(next_decode, last_frame - decode_interval) + decode_interval
+                ok, frame = cap.retrieve()
+                if ok:
+                    self.health["frames_retrieved"] += 1
+                    with self._condition:
+                        self._frame = frame
+                        self._frame_seq += 1
+                        self._condition.notify_all()
+
+            if interval:
+                next_at += interval
+                delay = next_at - time.time()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    next_at = time.time()
+        return False
@@ -0,0 +1,147 @@
+import collections
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from assets.config import ALERT_CONFIG
+
+
+class ClipRecorder:
+    """Pre/post-event clips from a byte-capped ring of JPEG-compressed frames
+
+    add() only hands the frame to the encoder thread (dropping it if the
+    encoder is behind), so the frame loop never waits on compression or disk.
+    trigger() returns the clip path at once; the clip is written by a
+    separate writer thread after post_seconds of footage have been collected.
+    """
+
+    def __init__(self, camera_id="default", output_dir=None, pre_seconds=None, post_seconds=None,
+                 max_bytes=None, jpeg_quality=None):
+        config = ALERT_CONFIG["clips"]
+        self.camera_id = camera_id
+        self.output_dir = output_dir or config["dir"]
+        self.pre_seconds = pre_seconds if pre_seconds is not None else config["pre_seconds"]
+        self.post_seconds = post_seconds if post_seconds is not None else config["post_seconds"]
+        self.max_bytes = max_bytes or config["max_bytes"]
+        self.jpeg_quality = jpeg_quality or config["jpeg_quality"]
+
+        # (timestamp, jpeg bytes), oldest first
+        self.ring = collections.deque()
+        self.ring_bytes = 0
+        self.frames_dropped = 0
+        self.clips_written = 0
+
+        self._inbox = queue.Queue(maxsize=2)
+        self._events = []
+        self._events_lock = threading.Lock()
+        self._writes = queue.Queue()
+        self._stop_event = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._encode_loop, name=f"{camera_id}-clip-encoder", daemon=True),
+            threading.Thread(target=self._write_loop, name=f"{camera_id}-clip-writer", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def add(self, frame, timestamp=None):
+        """Offer a BGR frame to the ring, never blocks"""
+        try:
+            self._inbox.put_nowait((timestamp or time.time(), frame))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def trigger(self, timestamp=None):
+        """Record an event at timestamp, returns the path the clip will be written to"""
+        timestamp = timestamp or time.time()
+        stamp = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        camera = re.sub(r"[^\w.-]", "_", str(self.camera_id))
+        path = os.path.join(self.output_dir, f"{camera}_{stamp}.mp4")
+        with self._events_lock:
+            self._events.append({"path": path, "end": timestamp + self.post_seconds,
+                                 "start": timestamp - self.pre_seconds, "frames": None})
+        return path
+
+    def close(self, timeout=5.0):
+        """Finish pending clips with whatever footage has arrived, then stop"""
+        self._stop_event.set()
+        self._threads[0].join(timeout)
+        with self._events_lock:
+            pending, self._events = self._events, []
+        for event in pending:
+            self._writes.put(event)
+        self._writes.put(None)
+        self._threads[1].join(timeout)
+
+    def _encode_loop(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        while not self._stop_event.is_set():
+            try:
+                timestamp, frame = self._inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            ok, encoded = cv2.imencode(".jpg", frame, params)
+            if not ok:
+                continue
+            jpeg = encoded.tobytes()
+
+            self.ring.append((timestamp, jpeg))
+            self.ring_bytes += len(jpeg)
+            while self.ring_bytes > self.max_bytes and len(self.ring) > 1:
+                self.ring_bytes -= len(self.ring.popleft()[1])
+
+            self._collect(timestamp, jpeg)
+
+    def _collect(self, timestamp, jpeg):
+        with self._events_lock:
+            events = list(self._events)
+        for event in events:
+            if event["frames"] is None:
+                # Pre-event footage is whatever the ring still holds
+                event["frames"] = [item for item in self.ring if item[0] >= event["start"]]
+                event["bytes"] = sum(len(item[1]) for item in event["frames"])
+            elif timestamp > event["end"]:
+                with self._events_lock:
+                    self._events.remove(event)
+                self._writes.put(event)
+            elif event["bytes"] + len(jpeg) <= self.max_bytes:
+                # Post-event footage is capped by the same byte budget
+                event["frames"].append((timestamp, jpeg))
+                event["bytes"] += len(jpeg)
+
+    def _write_loop(self):
+        while True:
+            event = self._writes.get()
+            if event is None:
+                return
+            try:
+                self._write_clip(event["path"], event["frames"] or [])
+            except Exception as e:
+                print(f"Clip write error ({event['path']}): {e}", file=sys.stderr)
+
+    def _write_clip(self, path, frames):
+        if not frames:
+            return
+        span = frames[-1][0] - frames[0][0]
+        fps = (len(frames) - 1) / span if span > 0 else 1.0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        writer = None
+        try:
+            for _, jpeg in frames:
+                image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+                if writer is None:
+                    height, width = image.shape[:2]
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+                writer.write(image)
+        finally:
+            if writer is not None:
+                writer.release()
+        self.clips_written += 1
@@ -1,45 +1,399 @@
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
 import cv2
 import numpy as np
-from ultralytics import YOLO
+
+from assets.config import DETECTION_CONFIG
+
+
+class TorchBackend:
+    """Ultralytics/PyTorch runtime (reference implementation)"""
+
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+
+    def predict(self, frames, conf):
+        """Person boxes per frame as (xyxy float array Nx4, scores N)"""
+        results = self.model(frames, classes=[0], conf=conf, verbose=False)
+        outputs = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                outputs.append((np.zeros((0, 4), np.float32), np.zeros(0, np.float32)))
+                continue
+            outputs.append((boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy()))
+        return outputs
+
+
+class _ExportedBackend:
+    """Shared YOLOv8 pre/post-processing for exported (ONNX/OpenVINO) models"""
+
+    def __init__(self, imgsz=None, iou_threshold=None):
+        self.imgsz = imgsz or DETECTION_CONFIG["imgsz"]
+        self.iou_threshold = iou_threshold or DETECTION_CONFIG["nms_iou"]
+        self.fixed_batch = False
+
+    def _letterbox(self, frame):
+        """Resize keeping aspect ratio and pad to imgsz, like ultralytics does"""
+        height, width = frame.shape[:2]
+        gain = min(self.imgsz / height, self.imgsz / width)
+        new_w, new_h = int(round(width * gain)), int(round(height * gain))
+        pad_x, pad_y = (self.imgsz - new_w) / 2, (self.imgsz - new_h) / 2
+
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+        canvas[top:top + new_h, left:left + new_w] = cv2.resize(
+            frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        return canvas, gain, (left, top)
+
+    def _preprocess(self, frames):
+        letterboxed = [self._letterbox(frame) for frame in frames]
+        # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+        batch = np.stack([canvas for canvas, _, _ in letterboxed])[..., ::-1]
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        return batch, [(gain, pad) for _, gain, pad in letterboxed]
+
+    def _postprocess(self, output, frame_shape, gain, pad, conf):
+        # output: (4 + num_classes, num_anchors) with cx, cy, w, h first
+        scores = output[4]
+        keep = scores > conf
+        if not keep.any():
+            return np.zeros((0, 4), np.float32), np.zeros(0, np.float32)
+
+        cxcywh = output[:4, keep].T
+        scores = scores[keep]
+        xyxy = np.empty_like(cxcywh)
+        xyxy[:, :2] = cxcywh[:, :2] - cxcywh[:, 2:] / 2
+        xyxy[:, 2:] = cxcywh[:, :2] + cxcywh[:, 2:] / 2
+
+        # Undo letterboxing and clip to the original frame
+        xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad[0]) / gain
+        xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad[1]) / gain
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, frame_shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, frame_shape[0])
+
+        xywh = np.concatenate([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+        indices = cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), conf, self.iou_threshold)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        order = indices[np.argsort(-scores[indices])]
+        return xyxy[order].astype(np.float32), scores[order].astype(np.float32)
+
+    def _run(self, batch):
+        raise NotImplementedError
+
+    def predict(self, frames, conf):
+        """Person boxes per frame as (xyxy float array Nx4, scores N)"""
+        batch, transforms = self._preprocess(frames)
+        if self.fixed_batch:
+            outputs = np.concatenate([self._run(batch[i:i + 1]) for i in range(len(batch))])
+        else:
+            outputs = self._run(batch)
+
+        return [
+            self._postprocess(output, frame.shape, gain, pad, conf)
+            for output, frame, (gain, pad) in zip(outputs, frames, transforms)
+        ]
+
+
+class OnnxRuntimeBackend(_ExportedBackend):
+    """ONNX Runtime CPU execution of an exported (optionally INT8) YOLOv8 model"""
+
+    def __init__(self, model_path, imgsz=None, iou_threshold=None, threads=None):
+        super().__init__(imgsz, iou_threshold)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Models exported without dynamic=True only accept one image per call
+        self.fixed_batch = isinstance(model_input.shape[0], int)
+        if isinstance(model_input.shape[2], int):
+            self.imgsz = model_input.shape[2]
+
+    def _run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVINOBackend(_ExportedBackend):
+    """OpenVINO CPU execution of an exported (optionally INT8) YOLOv8 model"""
+
+    def __init__(self, model_path, imgsz=None, iou_threshold=None):
+        super().__init__(imgsz, iou_threshold)
+        import openvino as ov
+
+        if os.path.isdir(model_path):
+            model_path = next(os.path.join(model_path, name) for name in os.listdir(model_path)
+                              if name.endswith(".xml"))
+        core = ov.Core()
+        model = core.read_model(model_path)
+        self.fixed_batch = not model.inputs[0].get_partial_shape()[0].is_dynamic
+        self.compiled = core.compile_model(model, "CPU", {"PERFORMANCE_HINT": "LATENCY"})
+        self.output = self.compiled.output(0)
+
+    def _run(self, batch):
+        return self.compiled(batch)[self.output]
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxRuntimeBackend,
+    "onnx_int8": OnnxRuntimeBackend,
+    "openvino": OpenVINOBackend,
+    "openvino_int8": OpenVINOBackend,
+}
+
+
+def create_backend(name=None, model_path=None):
+    """Build the inference backend selected in DETECTION_CONFIG"""
+    name = name or DETECTION_CONFIG["backend"]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detection backend: {name}")
+    return BACKENDS[name](model_path or DETECTION_CONFIG["model_paths"][name])
+
+
+def export_model(name, source_path=None):
+    """Export the PyTorch model for an ONNX/OpenVINO backend, returns the new model path"""
+    from ultralytics import YOLO
+
+    source_path = source_path or DETECTION_CONFIG["model_paths"]["torch"]
+    target_path = DETECTION_CONFIG["model_paths"][name]
+    imgsz = DETECTION_CONFIG["imgsz"]
+
+    if name.startswith("openvino"):
+        exported = YOLO(source_path).export(format="openvino", imgsz=imgsz, dynamic=True,
+                                            int8=name.endswith("_int8"))
+    elif name == "onnx":
+        exported = YOLO(source_path).export(format="onnx", imgsz=imgsz, dynamic=True)
+    elif name == "onnx_int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        fp32_path = export_model("onnx", source_path)
+        quantize_dynamic(fp32_path, target_path, weight_type=QuantType.QUInt8)
+        return target_path
+    else:
+        raise ValueError(f"Cannot export for backend: {name}")
+
+    if os.path.abspath(exported) != os.path.abspath(target_path):
+        os.replace(exported, target_path)
+    return target_path
+
+
+def box_iou(boxes_a, boxes_b):
+    """Pairwise IoU between two xyxy box arrays"""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def compare_detections(reference, candidate, iou_threshold=0.5):
+    """Greedy IoU matching of two backends' (xyxy, scores) outputs for the same frame
+
+    Returns (matched, missed, extra, mean_iou) where missed/extra count reference
+    and candidate boxes left without a partner.
+    """
+    ref_boxes, cand_boxes = reference[0], candidate[0]
+    if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+        return 0, len(ref_boxes), len(cand_boxes), 0.0
+
+    ious = box_iou(ref_boxes, cand_boxes)
+    matched_ious = []
+    while True:
+        i, j = np.unravel_index(np.argmax(ious), ious.shape)
+        if ious[i, j] < iou_threshold:
+            break
+        matched_ious.append(ious[i, j])
+        ious[i, :] = -1
+        ious[:, j] = -1
+
+    matched = len(matched_ious)
+    mean_iou = float(np.mean(matched_ious)) if matched_ious else 0.0
+    return matched, len(ref_boxes) - matched, len(cand_boxes) - matched, mean_iou
+
 
 class HumanDetector:
-    def __init__(self):
-        self.model = YOLO('yolov8n.pt')
+    def __init__(self, max_batch_size=None, confidence_threshold=None, backend=None):
+        # backend: name from DETECTION_CONFIG["model_paths"] or a backend instance.
+        # Named backends are loaded once per process and shared by every detector.
+        if backend is None or isinstance(backend, str):
+            from models.cache import shared_backend
+            backend = shared_backend(backend)
+        self.backend = backend
+        self.confidence_threshold = (confidence_threshold if confidence_threshold is not None
+                                     else DETECTION_CONFIG["min_human_confidence"])
         self.detection_history = []
-        
+        # Confidences of the bboxes returned by the last detect_humans call
+        self.last_scores = []
+        # Per-stream smoothing for batched multi-camera inference
+        self.stream_histories = {}
+        self.max_batch_size = max_batch_size or DETECTION_CONFIG["batch_max_size"]
+
+    def _predict(self, frames):
+        """Person-only inference with the confidence threshold applied inside the backend"""
+        return self.backend.predict(frames, self.confidence_threshold)
+
+    def _parse_result(self, result):
+        """Convert one backend result into [x, y, w, h] bboxes and their confidences"""
+        xyxy, conf = result
+        keep = conf > self.confidence_threshold
+        if not keep.any():
+            return [], []
+
+        xyxy = xyxy[keep].astype(np.int32)
+        xyxy[:, 2:] -= xyxy[:, :2]
+        return xyxy.tolist(), conf[keep].tolist()
+
+    def _update_history(self, history, human_present):
+        """Store detection history and return smoothed presence confidence"""
+        history.append(human_present)
+        if len(history) > 10:
+            history.pop(0)
+
+        return sum(history) / len(history) if history else 0
+
     def detect_humans(self, frame):
         """Detect humans in frame using YOLO"""
         if frame is None:
             return False, 0, []
-        
+
         try:
             # Run YOLO inference
-            results = self.model(frame, verbose=False)
-            
-            human_bboxes = []
-            max_confidence = 0
-            
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    # class 0 is 'person' in COCO dataset
-                    if int(box.cls) == 0 and box.conf > 0.5:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        human_bboxes.append([x1, y1, x2-x1, y2-y1])
-                        max_confidence = max(max_confidence, float(box.conf))
-            
+            human_bboxes, self.last_scores = self._parse_result(self._predict([frame])[0])
+
             human_present = len(human_bboxes) > 0
-            
-            # Store detection history for confidence
-            self.detection_history.append(human_present)
-            if len(self.detection_history) > 10:
-                self.detection_history.pop(0)
-            
-            presence_confidence = (sum(self.detection_history) / len(self.detection_history) 
-                                if self.detection_history else 0)
-            
+            presence_confidence = self._update_history(self.detection_history, human_present)
+
             return human_present, presence_confidence, human_bboxes
-            
+
         except Exception as e:
-            print(f"Detection error: {e}")
+            print(f"Detection error: {e}", file=sys.stderr)
+            self.last_scores = []
+            return False, 0, []
+
+    def detect_humans_batch(self, frames, stream_ids=None):
+        """Detect humans in frames from several streams with one forward pass per batch
+
+        Returns one (human_present, presence_confidence, bboxes) tuple per frame,
+        smoothing presence with a separate history for every stream id.
+        """
+        if stream_ids is None:
+            stream_ids = list(range(len(frames)))
+
+        outputs = [(False, 0, [])] * len(frames)
+        valid = [i for i, frame in enumerate(frames) if frame is not None]
+
+        for start in range(0, len(valid), self.max_batch_size):
+            chunk = valid[start:start + self.max_batch_size]
+            try:
+                results = self._predict([frames[i] for i in chunk])
+            except Exception as e:
+                print(f"Batch detection error: {e}", file=sys.stderr)
+                continue
+
+            for i, result in zip(chunk, results):
+                human_bboxes, _ = self._parse_result(result)
+                human_present = len(human_bboxes) > 0
+                history = self.stream_histories.setdefault(stream_ids[i], [])
+                presence_confidence = self._update_history(history, human_present)
+                outputs[i] = (human_present, presence_confidence, human_bboxes)
+
+        return outputs
+
+
+class BatchedDetector:
+    """Collects frames from several camera pipelines into shared YOLO batches
+
+    A batch is run as soon as max_batch_size frames are waiting or the oldest
+    one has waited max_wait seconds, whichever comes first.
+    """
+
+    def __init__(self, detector=None, max_batch_size=None, max_wait=None):
+        self.detector = detector or HumanDetector(max_batch_size=max_batch_size)
+        self.max_batch_size = max_batch_size or DETECTION_CONFIG["batch_max_size"]
+        self.max_wait = max_wait if max_wait is not None else DETECTION_CONFIG["batch_max_wait"]
+        self.batches_run = 0
+        self._requests = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._batch_loop, name="batched-detector", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, stream_id):
+        """Queue a frame for the next batch, returns a Future of the detection tuple"""
+        future = Future()
+        self._requests.put((frame, stream_id, future))
+        if self._stop_event.is_set():
+            # Raced with stop(): nobody will run this batch
+            self._fail_pending()
+        return future
+
+    def for_stream(self, stream_id):
+        """Detector-compatible handle that routes one stream through the shared batches"""
+        return _StreamDetector(self, stream_id)
+
+    def stop(self):
+        """Stop batching; frames still waiting fail instead of blocking their streams"""
+        self._stop_event.set()
+        self._thread.join(timeout=2.0)
+        self._fail_pending()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                _, _, future = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            future.set_exception(RuntimeError("BatchedDetector stopped"))
+
+    def _batch_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                batch = [self._requests.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            frames = [frame for frame, _, _ in batch]
+            stream_ids = [stream_id for _, stream_id, _ in batch]
+            try:
+                outputs = self.detector.detect_humans_batch(frames, stream_ids)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            for (_, _, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+
+class _StreamDetector:
+    def __init__(self, batcher, stream_id):
+        self.batcher = batcher
+        self.stream_id = stream_id
+
+    def detect_humans(self, frame):
+        """Detect humans through the shared batch, same return value as HumanDetector"""
+        if frame is None:
             return False, 0, []
+        return self.batcher.submit(frame, self.stream_id).result()
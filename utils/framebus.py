@@ -0,0 +1,203 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Control block: slots, height, width, channels, head (last published frame_id)
+_CONTROL = 8
+_ALIGN = 64
+
+
+def _aligned(size):
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class FrameBus:
+    """Ring of fixed-size frame slots in shared memory, one writer, any number of readers
+
+    Every slot has a sequence counter that the writer makes odd while it
+    copies a frame in and even again afterwards (a seqlock). Readers never
+    take a lock: they read the sequence, take a NumPy view of the slot and
+    re-check the sequence, retrying if the writer got in between. Views are
+    zero-copy, so a reader that holds one while the writer laps the ring must
+    call valid(frame_id) after using it (or read with copy=True).
+    """
+
+    def __init__(self, name=None, slots=4, shape=None, create=True):
+        if create:
+            if shape is None:
+                raise ValueError("FrameBus needs the frame shape (height, width, channels) to create")
+            height, width, channels = shape
+            size = self._layout(slots, height, width, channels)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            control = np.ndarray((_CONTROL,), np.int64, self.shm.buf)
+            control[:] = 0
+            control[:4] = (slots, height, width, channels)
+            control[4] = -1
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            slots, height, width, channels = (int(v) for v in np.ndarray((4,), np.int64, self.shm.buf))
+            self._layout(slots, height, width, channels)
+
+        self.owner = create
+        self.name = self.shm.name
+        self.slots = slots
+        self.shape = (height, width, channels)
+
+        buf = self.shm.buf
+        self.control = np.ndarray((_CONTROL,), np.int64, buf)
+        self.seq = np.ndarray((slots,), np.int64, buf, self._seq_offset)
+        self.frame_ids = np.ndarray((slots,), np.int64, buf, self._ids_offset)
+        self.timestamps = np.ndarray((slots,), np.float64, buf, self._ts_offset)
+        self.data = np.ndarray((slots,) + self.shape, np.uint8, buf, self._data_offset,
+                               strides=(self._slot_bytes,) + (width * channels, channels, 1))
+        if create:
+            self.seq[:] = 0
+            self.frame_ids[:] = -1
+
+    @classmethod
+    def attach(cls, name):
+        """Open a bus created by another process"""
+        return cls(name=name, create=False)
+
+    def _layout(self, slots, height, width, channels):
+        self._seq_offset = _aligned(_CONTROL * 8)
+        self._ids_offset = self._seq_offset + _aligned(slots * 8)
+        self._ts_offset = self._ids_offset + _aligned(slots * 8)
+        self._data_offset = self._ts_offset + _aligned(slots * 8)
+        self._slot_bytes = _aligned(height * width * channels)
+        return self._data_offset + slots * self._slot_bytes
+
+    @property
+    def head(self):
+        """frame_id of the newest published frame (-1 before the first)"""
+        return int(self.control[4])
+
+    def publish(self, frame, timestamp=None):
+        """Copy a frame into the next slot, returns its frame_id
+
+        Raises ValueError when the frame does not have the bus shape: frames
+        are never resized (or stretched) behind the reader's back.
+        """
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the bus shape {self.shape}")
+        frame_id = self.head + 1
+        slot = frame_id % self.slots
+        self.seq[slot] += 1  # odd: slot is being written
+        np.copyto(self.data[slot], frame)
+        self.frame_ids[slot] = frame_id
+        self.timestamps[slot] = timestamp or time.time()
+        self.seq[slot] += 1  # even: slot is consistent again
+        self.control[4] = frame_id
+        return frame_id
+
+    def read(self, frame_id=None, copy=False, retries=100):
+        """(frame_id, timestamp, frame) for frame_id (default: newest), or None
+
+        Returns None before the first frame, or when the requested frame has
+        already been overwritten.
+        """
+        for _ in range(retries):
+            wanted = self.head if frame_id is None else frame_id
+            if wanted < 0:
+                return None
+            slot = wanted % self.slots
+            before = self.seq[slot]
+            if before % 2:
+                continue
+            if self.frame_ids[slot] != wanted:
+                return None
+            frame = self.data[slot].copy() if copy else self.data[slot]
+            timestamp = float(self.timestamps[slot])
+            if self.seq[slot] == before:
+                return wanted, timestamp, frame
+        return None
+
+    def valid(self, frame_id):
+        """True while the slot read for frame_id still holds that frame"""
+        slot = frame_id % self.slots
+        before = self.seq[slot]
+        return before % 2 == 0 and self.frame_ids[slot] == frame_id and self.seq[slot] == before
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.control = self.seq = self.frame_ids = self.timestamps = self.data = None
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared memory (creator only, after every process has closed it)"""
+        if self.owner:
+            self.shm.unlink()
+
+
+class FramePublisher:
+    """Writer side of a FrameBus sized from the frames themselves
+
+    The bus is created on the first published frame with that frame's shape,
+    and recreated if the camera's resolution changes (e.g. after a
+    reconnect). on_create(bus) is called for every new bus so its name can
+    be handed to readers. Drop-in for FrameBus as MonitoringPipeline's
+    frame_bus.
+    """
+
+    def __init__(self, slots=4, on_create=None):
+        self.slots = slots
+        self.on_create = on_create
+        self.bus = None
+
+    @property
+    def name(self):
+        return self.bus.name if self.bus is not None else None
+
+    def publish(self, frame, timestamp=None):
+        if self.bus is None or self.bus.shape != frame.shape:
+            self.close()
+            self.bus = FrameBus(slots=self.slots, shape=frame.shape)
+            if self.on_create is not None:
+                self.on_create(self.bus)
+        return self.bus.publish(frame, timestamp)
+
+    def close(self):
+        """Close and free the current bus; readers keep their mapping until they close it"""
+        if self.bus is not None:
+            self.bus.close()
+            self.bus.unlink()
+            self.bus = None
+
+
+class BusCapture:
+    """cv2.VideoCapture-like reader of the newest frames on a FrameBus
+
+    Lets MonitoringPipeline run in a different process from the camera.
+    read() waits for a frame newer than the last one it returned.
+
+    Frames are copied by default: the pipeline holds each frame across its
+    stages and the clip ring for far longer than the writer takes to lap a
+    few-slot ring. copy=False returns zero-copy views, for readers that
+    finish with a frame (or check bus.valid(frame_id)) before the next read.
+    """
+
+    def __init__(self, bus, copy=True, timeout=1.0):
+        self.bus = FrameBus.attach(bus) if isinstance(bus, str) else bus
+        self.copy = copy
+        self.timeout = timeout
+        self.last_frame_id = -1
+
+    def isOpened(self):
+        return self.bus is not None
+
+    def read(self):
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            if self.bus.head > self.last_frame_id:
+                result = self.bus.read(copy=self.copy)
+                if result is not None:
+                    self.last_frame_id = result[0]
+                    return True, result[2]
+            time.sleep(0.002)
+        return False, None
+
+    def release(self):
+        if self.bus is not None and not self.bus.owner:
+            self.bus.close()
+        self.bus = None
@@ -0,0 +1,68 @@
+import time
+
+import cv2
+
+from assets.config import DETECTION_CONFIG
+
+
+class MotionGate:
+    """Cheap background-subtraction gate in front of YOLO
+
+    Runs MOG2 on a small grayscale copy of every frame and only lets frames
+    through to the detector when enough of the scene is moving, people are
+    already being tracked, or the periodic keep-alive is due.
+    """
+
+    def __init__(self, width=None, min_foreground=None, keepalive=None):
+        config = DETECTION_CONFIG["motion_gate"]
+        self.width = width or config["width"]
+        self.min_foreground = min_foreground if min_foreground is not None else config["min_foreground"]
+        self.keepalive = keepalive if keepalive is not None else config["keepalive"]
+        self.backSub = cv2.createBackgroundSubtractorMOG2(history=200, varThreshold=25, detectShadows=False)
+
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.foreground = 0.0
+        # Why the last checked frame was let through: "tracking", "motion", "keepalive" or None (skipped)
+        self.reason = None
+        self._small = None
+        self._last_open = 0.0
+
+    def measure(self, frame):
+        """Foreground fraction of the downscaled frame"""
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, int(height * self.width / width)))
+        if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+            self._small = None
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        self._small = cv2.resize(gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        fg_mask = self.backSub.apply(self._small)
+        self.foreground = cv2.countNonZero(fg_mask) / fg_mask.size
+        return self.foreground
+
+    def check(self, frame, tracking=False, now=None):
+        """Return True if the detector should see this frame (now: the frame's timestamp)"""
+        foreground = self.measure(frame)
+        now = now if now is not None else time.time()
+
+        if tracking:
+            self.reason = "tracking"
+        elif foreground >= self.min_foreground:
+            self.reason = "motion"
+        elif now - self._last_open >= self.keepalive:
+            self.reason = "keepalive"
+        else:
+            self.reason = None
+
+        if self.reason is not None:
+            self._last_open = now
+            self.frames_inferred += 1
+        else:
+            self.frames_skipped += 1
+        return self.reason is not None
+
+    @property
+    def skip_ratio(self):
+        total = self.frames_inferred + self.frames_skipped
+        return self.frames_skipped / total if total else 0.0
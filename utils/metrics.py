@@ -0,0 +1,260 @@
+import bisect
+import os
+import resource
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from assets.config import METRICS_CONFIG
+
+# Latency buckets in seconds, from sub-millisecond stages up to slow inference
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Cumulative bucketed histogram (Prometheus semantics) with quantile estimates"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Context manager observing the duration of its block"""
+        return _Timer(self)
+
+    def quantile(self, q):
+        """Linearly interpolated estimate from the buckets, None before any observation"""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class RateMeter:
+    """Events per second over a sliding window of a monotonically growing count"""
+
+    def __init__(self, window=5.0):
+        self.window = window
+        self._samples = deque()
+
+    def update(self, count, now=None):
+        now = now or time.time()
+        self._samples.append((now, count))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+    @property
+    def rate(self):
+        if len(self._samples) < 2:
+            return 0.0
+        (t0, c0), (t1, c1) = self._samples[0], self._samples[-1]
+        return (c1 - c0) / (t1 - t0) if t1 > t0 else 0.0
+
+
+def rss_bytes():
+    """Current resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """Named, labelled counters, histograms and callback gauges rendered as Prometheus text"""
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _child(self, kind, name, help, labels, factory):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, {"type": kind, "help": help, "children": {}})
+            if family["type"] != kind:
+                raise ValueError(f"Metric {name} already registered as a {family['type']}")
+            child = family["children"].get(key)
+            if child is None or kind == "gauge":
+                child = family["children"][key] = factory()
+            return child
+
+    def counter(self, name, help="", **labels):
+        return self._child("counter", name, help, labels, Counter)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._child("histogram", name, help, labels, lambda: Histogram(buckets))
+
+    def gauge(self, name, fn, help="", **labels):
+        """Gauge read from fn() at scrape time (re-registering replaces the callback)"""
+        return self._child("gauge", name, help, labels, lambda: fn)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            families = {name: (f["type"], f["help"], dict(f["children"])) for name, f in self._families.items()}
+        for name, (kind, help, children) in sorted(families.items()):
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, child in children.items():
+                if kind == "counter":
+                    lines.append(f"{name}{_label_text(labels)} {child.value}")
+                elif kind == "gauge":
+                    try:
+                        value = float(child())
+                    except Exception:
+                        continue
+                    lines.append(f"{name}{_label_text(labels)} {value}")
+                else:
+                    cumulative = 0
+                    for bound, count in zip(child.buckets + ("+Inf",), child.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {child.sum}")
+                    lines.append(f"{name}_count{_label_text(labels)} {child.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry shared by every pipeline in this process
+REGISTRY = MetricsRegistry()
+REGISTRY.gauge("cctv_process_rss_bytes", rss_bytes, "Resident memory of this process")
+
+
+class PipelineMetrics:
+    """The metrics one MonitoringPipeline records, labelled with its camera_id"""
+
+    def __init__(self, camera_id, registry=None):
+        self.registry = registry or REGISTRY
+        self.camera_id = camera_id
+        r, camera = self.registry, str(camera_id)
+        self.frames_captured = r.counter("cctv_frames_captured_total", "Frames read from the source", camera=camera)
+        self.frames_processed = r.counter("cctv_frames_processed_total", "Frames through every stage", camera=camera)
+        self.frames_dropped = r.counter("cctv_frames_dropped_total", "Stale frames dropped between stages",
+                                        camera=camera)
+        self.frames_skipped = r.counter("cctv_frames_skipped_total", "Frames the motion gate kept from the detector",
+                                        camera=camera)
+        self.frame_latency = r.histogram("cctv_frame_latency_seconds", "Capture to result latency", camera=camera)
+        self.capture_rate = RateMeter()
+        self.processed_rate = RateMeter()
+        self._stages = {}
+        self._errors = {}
+        self._alerts = {}
+
+    def stage(self, name):
+        histogram = self._stages.get(name)
+        if histogram is None:
+            histogram = self._stages[name] = self.registry.histogram(
+                "cctv_stage_seconds", "Time spent in each pipeline stage", camera=str(self.camera_id), stage=name)
+        return histogram
+
+    def stage_error(self, name):
+        counter = self._errors.get(name)
+        if counter is None:
+            counter = self._errors[name] = self.registry.counter(
+                "cctv_stage_errors_total", "Exceptions raised by a stage", camera=str(self.camera_id), stage=name)
+        counter.inc()
+
+    def alert(self, activity):
+        counter = self._alerts.get(activity)
+        if counter is None:
+            counter = self._alerts[activity] = self.registry.counter(
+                "cctv_alerts_total", "Alerts raised", camera=str(self.camera_id), activity=activity)
+        counter.inc()
+
+    def stage_quantiles(self, q=(0.5, 0.95)):
+        """{stage: [seconds per quantile]} for the dashboard"""
+        return {name: [h.quantile(x) for x in q] for name, h in self._stages.items()}
+
+
+class MetricsServer:
+    """Serves a registry as Prometheus text on /metrics"""
+
+    def __init__(self, registry=None, host=None, port=None):
+        self.registry = registry or REGISTRY
+        self.host = host or METRICS_CONFIG["host"]
+        self.port = port if port is not None else METRICS_CONFIG["port"]
+        self._server = None
+
+    @property
+    def url(self):
+        port = self._server.server_address[1] if self._server is not None else self.port
+        return f"http://{self.host}:{port}/metrics"
+
+    def start(self):
+        if self._server is not None:
+            return
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if not self.path.startswith("/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -1,47 +1,141 @@
 import cv2
 import numpy as np
 
+from assets.config import DETECTION_CONFIG
+
+# Activities from calmest to most alarming, with the confidence each label carries
+ACTIVITY_LEVELS = ["standing", "talking", "walking", "walking_fast", "possible_running", "running"]
+ACTIVITY_CONFIDENCE = {
+    "standing": "high",
+    "talking": "medium",
+    "walking": "medium",
+    "walking_fast": "medium",
+    "possible_running": "low",
+    "running": "high",
+}
+
+
+def sensitivity_factor(sensitivity):
+    """Threshold multiplier for the 1-10 sidebar sensitivity (5 = thresholds as configured)"""
+    return 5.0 / max(1, min(10, sensitivity))
+
+
+def classify_level(value, thresholds, sensitivity=5):
+    """First activity whose upper threshold is above value, else the most alarming one"""
+    factor = sensitivity_factor(sensitivity)
+    for activity, upper in thresholds.items():
+        if value < upper * factor:
+            return activity
+    return ACTIVITY_LEVELS[-1]
+
+
+def union_rects(boxes):
+    """Split the union of [x1, y1, x2, y2] boxes into disjoint rectangles
+
+    Sweeps the vertical slabs between box edges and merges the covering y
+    intervals in each, so every pixel of the union is counted exactly once.
+    """
+    if len(boxes) == 1:
+        return [tuple(boxes[0])]
+
+    xs = np.unique(boxes[:, [0, 2]])
+    rects = []
+    for xa, xb in zip(xs[:-1], xs[1:]):
+        covering = boxes[(boxes[:, 0] <= xa) & (boxes[:, 2] >= xb)]
+        if len(covering) == 0:
+            continue
+        intervals = covering[np.argsort(covering[:, 1]), 1::2]
+        ya, yb = intervals[0]
+        for y1, y2 in intervals[1:]:
+            if y1 > yb:
+                rects.append((xa, ya, xb, yb))
+                ya, yb = y1, y2
+            else:
+                yb = max(yb, y2)
+        rects.append((xa, ya, xb, yb))
+    return rects
+
+
 class MotionAnalyzer:
-    def __init__(self):
+    def __init__(self, scale=None, sensitivity=5):
         self.backSub = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16, detectShadows=True)
         self.motion_history = []
-        
+        self.sensitivity = sensitivity
+        # Foreground fraction inside each bbox of the last analyze_motion call
+        self.last_box_motion = []
+        # Background model resolution relative to the analysis frame. The union-of-boxes
+        # counting saves allocations, not time: at 1.0 MOG2 dominates and a call is a
+        # little slower than the old full-frame mask, so the default downscales
+        self.scale = scale or DETECTION_CONFIG["motion_scale"]
+        self._small = None
+        self._fg_mask = None
+
+    def _foreground(self, frame):
+        """Foreground mask at self.scale, reusing the resize and mask buffers"""
+        if self.scale != 1.0:
+            height, width = frame.shape[:2]
+            size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+            if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+                self._small = None
+                self._fg_mask = None
+            self._small = cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+            frame = self._small
+        elif self._fg_mask is not None and self._fg_mask.shape != frame.shape[:2]:
+            self._fg_mask = None
+
+        self._fg_mask = self.backSub.apply(frame, fgmask=self._fg_mask)
+        return self._fg_mask
+
     def analyze_motion(self, frame, human_bboxes):
         """Analyze motion in human regions"""
         if frame is None or len(human_bboxes) == 0:
+            self.motion_history.clear()
+            self.last_box_motion = []
             return "no_humans", 0.0, "no_confidence"
         
         # Apply background subtraction
-        fg_mask = self.backSub.apply(frame)
+        fg_mask = self._foreground(frame)
+        height, width = fg_mask.shape
+        
+        # Human regions in mask coordinates, clipped to the frame
+        boxes = np.asarray(human_bboxes, dtype=np.float32).reshape(-1, 4) * self.scale
+        boxes[:, 2:] += boxes[:, :2]
+        boxes = np.round(boxes).astype(np.int32)
+        np.clip(boxes[:, 0::2], 0, width, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, height, out=boxes[:, 1::2])
         
-        # Create mask for human regions only
-        human_mask = np.zeros_like(fg_mask)
-        for (x, y, w, h) in human_bboxes:
-            human_mask[y:y+h, x:x+w] = fg_mask[y:y+h, x:x+w]
+        # Per-person foreground fraction for the temporal activity classifier
+        self.last_box_motion = [
+            cv2.countNonZero(fg_mask[y1:y2, x1:x2]) / ((x2 - x1) * (y2 - y1)) if x2 > x1 and y2 > y1 else 0.0
+            for x1, y1, x2, y2 in boxes.tolist()
+        ]
+        boxes = boxes[(boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])]
+        
+        # Count foreground pixels only inside the union of the boxes (no full-frame temporaries)
+        total_human_pixels = 0
+        if len(boxes) > 0:
+            overlaps = ((boxes[:, None, 0] < boxes[None, :, 2]) & (boxes[None, :, 0] < boxes[:, None, 2]) &
+                        (boxes[:, None, 1] < boxes[None, :, 3]) & (boxes[None, :, 1] < boxes[:, None, 3]))
+            isolated = overlaps.sum(axis=1) == 1
+            # Isolated boxes are counted directly, overlapping ones via disjoint pieces
+            rects = boxes[isolated].tolist()
+            if not isolated.all():
+                rects += union_rects(boxes[~isolated])
+            for x1, y1, x2, y2 in rects:
+                total_human_pixels += cv2.countNonZero(fg_mask[y1:y2, x1:x2])
         
         # Calculate motion percentage
-        total_human_pixels = np.sum(human_mask > 0)
-        total_frame_pixels = frame.shape[0] * frame.shape[1]
+        total_frame_pixels = height * width
         motion_level = total_human_pixels / total_frame_pixels if total_frame_pixels > 0 else 0
         
+        # Smooth over recent frames so one noisy mask doesn't flip the label
+        self.motion_history.append(motion_level)
+        if len(self.motion_history) > DETECTION_CONFIG["motion_window"]:
+            self.motion_history.pop(0)
+        motion_level = sum(self.motion_history) / len(self.motion_history)
+        
         # Determine activity
-        if motion_level < 0.001:
-            activity = "standing"
-            confidence = "high"
-        elif motion_level < 0.005:
-            activity = "talking"
-            confidence = "medium"
-        elif motion_level < 0.015:
-            activity = "walking"
-            confidence = "medium"
-        elif motion_level < 0.03:
-            activity = "walking_fast"
-            confidence = "medium"
-        elif motion_level < 0.06:
-            activity = "possible_running"
-            confidence = "low"
-        else:
-            activity = "running"
-            confidence = "high"
+        activity = classify_level(motion_level, DETECTION_CONFIG["motion_thresholds"], self.sensitivity)
+        confidence = ACTIVITY_CONFIDENCE[activity]
         
         return activity, motion_level, confidence
@@ -0,0 +1,240 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import smtplib
+import sys
+import threading
+import urllib.request
+from email.message import EmailMessage
+
+from assets.config import ALERT_CONFIG, APP_CONFIG
+
+
+class EmailChannel:
+    """Sends a batch of alerts as one email over SMTP"""
+
+    name = "email"
+
+    def __init__(self, host, port, sender, recipient, password=None, use_tls=True, timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipient = recipient
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    def _message(self, alerts):
+        activities = sorted({alert["activity"] for alert in alerts})
+        message = EmailMessage()
+        message["Subject"] = f"[{APP_CONFIG['name']}] {len(alerts)} alert(s): {', '.join(activities)}"
+        message["From"] = self.sender
+        message["To"] = self.recipient
+        message.set_content("\n".join(
+            f"{alert['timestamp']}  {alert.get('camera_id', 'default')}  {alert['activity'].upper()}  "
+            f"motion {alert['motion_level']:.1%}  confidence {alert['confidence']}"
+            for alert in alerts
+        ))
+        return message
+
+    def _send_sync(self, alerts):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.password:
+                smtp.login(self.sender, self.password)
+            smtp.send_message(self._message(alerts))
+
+    async def send(self, alerts):
+        await asyncio.get_running_loop().run_in_executor(None, self._send_sync, alerts)
+
+
+class WebhookChannel:
+    """POSTs a batch of alerts as JSON to an HTTP endpoint"""
+
+    name = "webhook"
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def _send_sync(self, alerts):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"alerts": alerts}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def send(self, alerts):
+        await asyncio.get_running_loop().run_in_executor(None, self._send_sync, alerts)
+
+
+class SoundChannel:
+    """Rings the terminal bell once per batch
+
+    Written to stderr: headless mode streams JSON lines on stdout.
+    """
+
+    name = "sound"
+
+    async def send(self, alerts):
+        sys.stderr.write("\a")
+        sys.stderr.flush()
+
+
+def build_channels():
+    """Notification channels enabled in ALERT_CONFIG / .env"""
+    channels = []
+    if ALERT_CONFIG["email_enabled"]:
+        channels.append(EmailChannel(
+            ALERT_CONFIG["smtp_host"],
+            ALERT_CONFIG["smtp_port"],
+            sender=os.getenv("EMAIL_USER"),
+            recipient=os.getenv("ADMIN_EMAIL"),
+            password=os.getenv("EMAIL_PASSWORD"),
+            use_tls=ALERT_CONFIG["smtp_tls"]
+        ))
+    webhook_url = ALERT_CONFIG["webhook_url"] or os.getenv("ALERT_WEBHOOK_URL")
+    if webhook_url:
+        channels.append(WebhookChannel(webhook_url))
+    if ALERT_CONFIG["sound_enabled"]:
+        channels.append(SoundChannel())
+    return channels
+
+
+class AlertDispatcher:
+    """Delivers alerts to notification channels from an asyncio loop in its own thread
+
+    dispatch() is safe to call from the frame loop and never blocks. Bursts are
+    batched for batch_window seconds, every channel has its own concurrency
+    limit, and failed deliveries are retried with exponential backoff.
+    """
+
+    def __init__(self, channels, batch_window=None, max_batch=None, max_retries=None,
+                 retry_backoff=None, concurrency=None, queue_size=1000):
+        config = ALERT_CONFIG["dispatch"]
+        self.channels = list(channels)
+        self.batch_window = batch_window if batch_window is not None else config["batch_window"]
+        self.max_batch = max_batch or config["max_batch"]
+        self.max_retries = max_retries if max_retries is not None else config["max_retries"]
+        self.retry_backoff = retry_backoff if retry_backoff is not None else config["retry_backoff"]
+        self.concurrency = concurrency or config["concurrency"]
+        self.queue_size = queue_size
+
+        self.sent = {channel.name: 0 for channel in self.channels}
+        self.failed = {channel.name: 0 for channel in self.channels}
+        self.dropped = 0
+
+        self._loop = None
+        self._queue = None
+        self._tasks = set()
+        self._ready = threading.Event()
+        self._thread = None
+        # Serializes start/stop, so concurrent dispatch() calls never see a half-started loop
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self._start()
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout=5.0):
+        """Stop after in-flight deliveries finish (or timeout)"""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._ready.wait()
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+            except concurrent.futures.TimeoutError:
+                print("Alert dispatcher stopped with deliveries still pending", file=sys.stderr)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+            self._loop = None
+            # A later start() must wait for the new loop again
+            self._ready.clear()
+
+    def dispatch(self, alert):
+        """Queue an alert for delivery, never blocks the caller (except while starting or stopping)"""
+        with self._lock:
+            self._start()
+            loop = self._loop
+        try:
+            loop.call_soon_threadsafe(self._enqueue, dict(alert))
+        except RuntimeError:
+            # Loop closed by a concurrent stop()
+            self.dropped += 1
+
+    def _enqueue(self, alert):
+        if self._queue.qsize() >= self.queue_size:
+            self.dropped += 1
+            return
+        self._queue.put_nowait(alert)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._limits = {channel.name: asyncio.Semaphore(self.concurrency) for channel in self.channels}
+        self._consumer = self._loop.create_task(self._consume())
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self):
+        # Queued alerts ahead of the sentinel are still delivered
+        self._queue.put_nowait(None)
+        await self._consumer
+        while self._tasks:
+            await asyncio.wait(self._tasks)
+
+    async def _consume(self):
+        stopping = False
+        while not stopping:
+            alert = await self._queue.get()
+            if alert is None:
+                return
+            batch = [alert]
+            # Collect the rest of a burst into the same notification
+            deadline = self._loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    alert = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if alert is None:
+                    stopping = True
+                    break
+                batch.append(alert)
+
+            for channel in self.channels:
+                task = self._loop.create_task(self._deliver(channel, batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, channel, batch):
+        async with self._limits[channel.name]:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await channel.send(batch)
+                    self.sent[channel.name] += len(batch)
+                    return
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        print(f"Alert {channel.name} delivery failed: {e}", file=sys.stderr)
+                        self.failed[channel.name] += len(batch)
+                        return
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
@@ -0,0 +1,203 @@
+import math
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from assets.config import OFFLINE_CONFIG
+from utils.motion import ACTIVITY_LEVELS
+
+# Activity labels are stored as int8 codes into this list (-1: undecided)
+ACTIVITY_NAMES = ["no_humans"] + ACTIVITY_LEVELS
+
+# Track ids are offset per chunk so they stay unique across the whole file
+TRACK_ID_STRIDE = 1 << 20
+
+# Per-frame and per-detection output columns
+FRAME_DTYPES = {"frame": np.int32, "time": np.float64, "gate_open": np.bool_, "humans": np.int16,
+                "confidence": np.float32, "motion_level": np.float32, "activity": np.int8}
+DETECTION_DTYPES = {"frame": np.int32, "track_id": np.int64, "x": np.int32, "y": np.int32,
+                    "w": np.int32, "h": np.int32, "activity": np.int8}
+
+
+def plan_chunks(frame_count, fps, chunks=None, chunk_seconds=None, warmup_seconds=None):
+    """[(start, end, warm_start)] frame ranges covering the file
+
+    Every chunk except the first also replays warmup_seconds of the
+    preceding footage, whose results are discarded. The last chunk's end is
+    None (read to EOF): container frame counts are often only estimates.
+    """
+    chunk_frames = max(1, int(round((chunk_seconds or OFFLINE_CONFIG["chunk_seconds"]) * fps)))
+    if chunks:
+        chunk_frames = max(1, math.ceil(frame_count / chunks))
+    warmup = int(round((warmup_seconds if warmup_seconds is not None else OFFLINE_CONFIG["warmup_seconds"]) * fps))
+    plan = [(start, min(start + chunk_frames, frame_count), max(0, start - warmup))
+            for start in range(0, frame_count, chunk_frames)]
+    if plan:
+        start, _, warm_start = plan[-1]
+        plan[-1] = (start, None, warm_start)
+    return plan
+
+
+def _default_pipeline(camera_id, rotation):
+    from utils.activity import ActivityClassifier
+    from utils.cadence import AdaptiveDetector
+    from utils.detection import HumanDetector
+    from utils.gate import MotionGate
+    from utils.motion import MotionAnalyzer
+    from utils.pipeline import MonitoringPipeline
+    from utils.preprocess import FramePreprocessor
+    from utils.tracker import ByteTracker
+
+    return MonitoringPipeline(
+        None, AdaptiveDetector(HumanDetector()), MotionAnalyzer(), None,
+        preprocess=FramePreprocessor(rotation) if rotation else None,
+        camera_id=camera_id,
+        gate=MotionGate(),
+        tracker=ByteTracker(),
+        activity_classifier=ActivityClassifier()
+    )
+
+
+def _activity_code(activity):
+    return ACTIVITY_NAMES.index(activity) if activity in ACTIVITY_NAMES else -1
+
+
+def analyze_chunk(path, index, start, end, warm_start, rotation=0, make_pipeline=None):
+    """Worker entry point: analyze frames [start, end) of path (end None: to EOF), returns column arrays"""
+    import cv2
+    # Parallelism comes from the process pool: one core per chunk
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    if warm_start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, warm_start)
+    pipeline = (make_pipeline or _default_pipeline)(f"{os.path.basename(path)}-{index}", rotation)
+
+    frames = {"frame": [], "time": [], "gate_open": [], "humans": [], "confidence": [],
+              "motion_level": [], "activity": []}
+    detections = {"frame": [], "track_id": [], "x": [], "y": [], "w": [], "h": [], "activity": []}
+    try:
+        frame_id = warm_start - 1
+        while end is None or frame_id + 1 < end:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frame_id += 1
+            packet = pipeline.process(frame, frame_id / fps, frame_id)
+            if frame_id < start:
+                continue
+
+            bboxes = packet["human_bboxes"]
+            track_ids = packet["track_ids"] or [-1] * len(bboxes)
+            track_activities = packet["track_activities"] or [None] * len(bboxes)
+            frames["frame"].append(frame_id)
+            frames["time"].append(frame_id / fps)
+            frames["gate_open"].append(packet.get("gate_open", True))
+            frames["humans"].append(len(bboxes))
+            frames["confidence"].append(packet["human_confidence"])
+            frames["motion_level"].append(packet["motion_level"])
+            frames["activity"].append(_activity_code(packet["activity"]))
+            for (x, y, w, h), track_id, activity in zip(bboxes, track_ids, track_activities):
+                detections["frame"].append(frame_id)
+                detections["track_id"].append(track_id + index * TRACK_ID_STRIDE if track_id >= 0 else -1)
+                detections["x"].append(x)
+                detections["y"].append(y)
+                detections["w"].append(w)
+                detections["h"].append(h)
+                detections["activity"].append(_activity_code(activity))
+    finally:
+        cap.release()
+
+    return _to_arrays(frames, FRAME_DTYPES), _to_arrays(detections, DETECTION_DTYPES)
+
+
+def _to_arrays(columns, dtypes):
+    return {name: np.asarray(values, dtype=dtypes[name]) for name, values in columns.items()}
+
+
+def _concat(parts, dtypes):
+    return {name: np.concatenate([part[name] for part in parts]) if parts else np.zeros(0, dtype)
+            for name, dtype in dtypes.items()}
+
+
+def analyze_video(path, workers=None, chunks=None, chunk_seconds=None, warmup_seconds=None, rotation=0,
+                  make_pipeline=None, on_chunk=None):
+    """Analyze a video file in parallel chunks, returns (frame columns, detection columns)
+
+    make_pipeline(camera_id, rotation) builds the MonitoringPipeline each chunk
+    runs (must be picklable); on_chunk(done, total) reports progress.
+    """
+    import cv2
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video: {path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    if frame_count <= 0:
+        # No frame index (raw .h264/.ts, many DVR exports): count by demuxing the file once
+        frame_count = 0
+        while cap.grab():
+            frame_count += 1
+    cap.release()
+    if frame_count == 0:
+        raise RuntimeError(f"No frames in video: {path}")
+
+    if not workers:
+        workers = OFFLINE_CONFIG["workers"] or (len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity")
+                                                else os.cpu_count() or 1)
+    if chunks is None and chunk_seconds is None:
+        # At least one chunk per worker, but no longer than chunk_seconds
+        chunks = max(workers, math.ceil(frame_count / (OFFLINE_CONFIG["chunk_seconds"] * fps)))
+    plan = plan_chunks(frame_count, fps, chunks, chunk_seconds, warmup_seconds)
+
+    results = [None] * len(plan)
+    # spawn: workers load their own model instead of inheriting the parent's threads
+    with ProcessPoolExecutor(max_workers=min(workers, len(plan)), mp_context=mp.get_context("spawn")) as pool:
+        futures = {pool.submit(analyze_chunk, path, i, start, end, warm_start, rotation, make_pipeline): i
+                   for i, (start, end, warm_start) in enumerate(plan)}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if on_chunk is not None:
+                on_chunk(done, len(plan))
+
+    return (_concat([frames for frames, _ in results], FRAME_DTYPES),
+            _concat([detections for _, detections in results], DETECTION_DTYPES))
+
+
+def write_columns(path, frames, detections, fmt=None):
+    """Write both tables as parquet (pyarrow) or one compressed .npz, returns the written paths"""
+    fmt = fmt or OFFLINE_CONFIG["format"]
+    if fmt in ("auto", "parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            if fmt == "parquet":
+                raise
+        else:
+            base = os.path.splitext(path)[0]
+            paths = []
+            for suffix, columns in (("frames", frames), ("detections", detections)):
+                table = pa.table({name: pa.array(values) for name, values in columns.items()})
+                # Activity codes become a dictionary-encoded string column
+                labels = pa.DictionaryArray.from_arrays(
+                    pa.array(np.maximum(columns["activity"], 0).astype(np.int32)), pa.array(ACTIVITY_NAMES),
+                    mask=pa.array(columns["activity"] < 0))
+                table = table.set_column(table.schema.get_field_index("activity"), "activity", labels)
+                paths.append(f"{base}.{suffix}.parquet")
+                pq.write_table(table, paths[-1], compression="zstd")
+            return paths
+
+    path = os.path.splitext(path)[0] + ".npz"
+    np.savez_compressed(path, activity_names=np.array(ACTIVITY_NAMES),
+                        **{f"frames_{name}": values for name, values in frames.items()},
+                        **{f"detections_{name}": values for name, values in detections.items()})
+    return [path]
@@ -0,0 +1,440 @@
+import queue
+import sys
+import threading
+import time
+
+from assets.config import DETECTION_CONFIG, PROFILER_CONFIG
+from utils.activity import most_alarming
+from utils.metrics import PipelineMetrics
+from utils.profiler import SamplingProfiler
+from utils.motion import ACTIVITY_CONFIDENCE
+
+
+class LatestQueue:
+    """Bounded queue where a full put drops the oldest item (latest frame wins)"""
+
+    def __init__(self, maxsize=1, drop=True, on_drop=None):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.drop = drop
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item, stop_event=None):
+        """Put an item, evicting stale ones instead of blocking when dropping is enabled"""
+        if not self.drop:
+            # Lossless mode (e.g. video files): apply real backpressure
+            return self.put_wait(item, stop_event)
+
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                try:
+                    stale = self._queue.get_nowait()
+                    self.dropped += 1
+                    if self.on_drop is not None:
+                        self.on_drop(stale)
+                except queue.Empty:
+                    pass
+
+    def put_wait(self, item, stop_event=None):
+        """Put an item without evicting anything, waiting for room"""
+        while stop_event is None or not stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, timeout=None):
+        """Get the next item, raises queue.Empty on timeout"""
+        return self._queue.get(timeout=timeout)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+# Marks the end of a finite source (video file) as it flows through the stages
+END_OF_STREAM = object()
+
+
+class MonitoringPipeline:
+    """Background capture -> preprocess -> detect -> motion -> alert pipeline
+
+    Each stage runs in its own thread and stages are linked by bounded
+    LatestQueues, so a slow stage only ever sees the newest frame. Consumers
+    (the Streamlit UI, the headless runner) just read the newest result.
+    """
+
+    STAGES = ("capture", "preprocess", "gate", "detect", "motion", "alert")
+
+    def __init__(self, capture, detector, motion_analyzer, alert_system,
+                 preprocess=None, alert_cooldown=60, queue_size=1, drop_frames=True,
+                 stop_at_end=False, on_result=None, camera_id="default", gate=None,
+                 tracker=None, activity_classifier=None, recorder=None, frame_bus=None,
+                 metrics=None, idle_timeout=None, on_idle=None):
+        self.capture = capture
+        self.detector = detector
+        self.motion_analyzer = motion_analyzer
+        self.alert_system = alert_system
+        self.preprocess = preprocess
+        self.alert_cooldown = alert_cooldown
+        self.stop_at_end = stop_at_end
+        self.on_result = on_result
+        self.camera_id = camera_id
+        # Optional MotionGate: frames it rejects never reach the detector
+        self.gate = gate
+        # Optional ByteTracker assigning stable ids to detected people
+        self.tracker = tracker
+        # Optional ActivityClassifier (needs the tracker) for per-person activity
+        self.activity_classifier = activity_classifier
+        # Optional ClipRecorder saving footage around each alert
+        self.recorder = recorder
+        # Optional FrameBus publishing captured frames to other processes
+        self.frame_bus = frame_bus
+        # Active or last SamplingProfiler started by profile()
+        self.profiler = None
+        # Stop by itself once latest_result() has not been read for idle_timeout seconds
+        # (e.g. a dashboard tab closed without STOP), then call on_idle(pipeline)
+        self.idle_timeout = idle_timeout
+        self.on_idle = on_idle
+        self.stopped_idle = False
+        self.last_read_at = None
+        self._tracking = False
+        self._last_foreground = 0.0
+        self._gate_closed = False
+
+        # One queue in front of every stage except capture
+        self.queues = {
+            name: LatestQueue(maxsize=queue_size, drop=drop_frames, on_drop=self._on_drop)
+            for name in self.STAGES[1:]
+        }
+
+        # Stage latency histograms, frame/alert counters and live gauges
+        self.metrics = metrics or PipelineMetrics(camera_id)
+        registry, camera = self.metrics.registry, str(camera_id)
+        for name, q in self.queues.items():
+            registry.gauge("cctv_queue_depth", q.qsize, "Packets waiting in front of a stage",
+                           camera=camera, stage=name)
+        registry.gauge("cctv_uptime_seconds", lambda: self.uptime, "Seconds since the pipeline started",
+                       camera=camera)
+        registry.gauge("cctv_capture_fps", lambda: self.capture_fps, "Frames read per second", camera=camera)
+        registry.gauge("cctv_processed_fps", lambda: self.processed_fps, "Frames processed per second",
+                       camera=camera)
+
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.last_error = None
+        self.started_at = None
+
+        self._stop_event = threading.Event()
+        self.finished = threading.Event()
+        self._threads = []
+        self._result_lock = threading.Lock()
+        self._latest_result = None
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    @property
+    def frames_dropped(self):
+        return sum(q.dropped for q in self.queues.values())
+
+    @property
+    def uptime(self):
+        return time.time() - self.started_at if self.started_at is not None else 0.0
+
+    @property
+    def capture_fps(self):
+        return self.metrics.capture_rate.rate
+
+    @property
+    def processed_fps(self):
+        return self.metrics.processed_rate.rate
+
+    def start(self):
+        """Start all stage threads"""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self.finished.clear()
+        self.started_at = self.last_read_at = time.time()
+        self.stopped_idle = False
+
+        targets = {
+            "capture": self._capture_loop,
+            "preprocess": lambda: self._stage_loop("preprocess", "gate", self._preprocess),
+            "gate": lambda: self._stage_loop("gate", "detect", self._gate),
+            "detect": lambda: self._stage_loop("detect", "motion", self._detect),
+            "motion": lambda: self._stage_loop("motion", "alert", self._analyze_motion),
+            "alert": lambda: self._stage_loop("alert", None, self._alert),
+        }
+        self._threads = [
+            threading.Thread(target=targets[name], name=f"{self.camera_id}-{name}", daemon=True)
+            for name in self.STAGES
+        ]
+        if self.idle_timeout:
+            self._threads.append(threading.Thread(target=self._watchdog_loop, name=f"{self.camera_id}-watchdog",
+                                                  daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        """Signal all stages to stop and wait for them, then finish pending clips"""
+        self._stop_event.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=timeout)
+        self._threads = []
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def wait(self, timeout=None):
+        """Block until a finite source has been fully processed"""
+        return self.finished.wait(timeout)
+
+    def profile(self, frames=None, interval=None):
+        """Sample every thread while the next N frames are processed, then write profiles
+
+        Safe to call while running; returns the SamplingProfiler (already
+        running ones are returned as is).
+        """
+        if self.profiler is not None and self.profiler.running:
+            return self.profiler
+        frames = frames or PROFILER_CONFIG["frames"]
+        target = self.frames_processed + frames
+        tags = {
+            "camera_id": self.camera_id,
+            "frames": frames,
+            "detector": type(self.detector).__name__,
+            "rotation": getattr(self.preprocess, "rotation", 0),
+            "gate": self.gate is not None,
+            "tracker": self.tracker is not None,
+            "drop_frames": self.queues["preprocess"].drop,
+            "detection_config": DETECTION_CONFIG,
+        }
+        self.profiler = SamplingProfiler(self.camera_id, interval=interval, tags=tags)
+        self.profiler.start(until=lambda: (self.frames_processed >= target or self.finished.is_set()
+                                           or self._stop_event.is_set()))
+        return self.profiler
+
+    def process(self, frame, captured_at, frame_id=None):
+        """Run one frame through preprocess, gate, detect and motion on the calling thread
+
+        For offline analysis: no threads, queues or alerts, and captured_at is
+        the frame's media time, so keep-alives and speeds follow the footage
+        rather than the much faster wall clock. Pooled frame buffers are
+        released before returning; read only the analysis fields.
+        """
+        packet = {"camera_id": self.camera_id, "frame_id": frame_id, "captured_at": captured_at, "frame": frame}
+        for name, stage in (("preprocess", self._preprocess), ("gate", self._gate),
+                            ("detect", self._detect), ("motion", self._analyze_motion)):
+            with self.metrics.stage(name).time():
+                packet = stage(packet)
+        self._release(packet)
+        self.frames_processed += 1
+        return packet
+
+    def latest_result(self, copy_frames=True):
+        """Newest fully processed result, or None before the first one
+
+        Pooled frame buffers are copied while the result is still published,
+        so a newer result cannot recycle them while the caller reads them.
+        With copy_frames=False no buffer is copied and "frame"/"display" are
+        None, for readers that only need the analysis fields.
+        """
+        self.last_read_at = time.time()
+        with self._result_lock:
+            result = self._latest_result
+            if result is None:
+                return None
+            if not copy_frames:
+                return dict(result, frame=None, display=None)
+            if hasattr(self.preprocess, "detach"):
+                result = self.preprocess.detach(result)
+            return result
+
+    def _watchdog_loop(self):
+        while not self._stop_event.wait(min(1.0, self.idle_timeout)):
+            if time.time() - self.last_read_at > self.idle_timeout:
+                print(f"Pipeline {self.camera_id}: no reader for {self.idle_timeout:.0f}s, stopping",
+                      file=sys.stderr)
+                self.stopped_idle = True
+                self.stop()
+                if self.on_idle is not None:
+                    self.on_idle(self)
+                return
+
+    def _capture_loop(self):
+        capture_time = self.metrics.stage("capture")
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            try:
+                ret, frame = self.capture.read()
+            except Exception as e:
+                ret, frame = False, None
+                self.last_error = f"Capture error: {e}"
+                self.metrics.stage_error("capture")
+
+            if not ret or frame is None:
+                if self.stop_at_end:
+                    self.queues["preprocess"].put_wait(END_OF_STREAM, self._stop_event)
+                    return
+                health = getattr(self.capture, "health", None)
+                if health is not None and health["state"] != "streaming":
+                    self.last_error = self.capture.status
+                else:
+                    self.last_error = self.last_error or "No frame received from camera"
+                time.sleep(0.05)
+                continue
+
+            capture_time.observe(time.perf_counter() - start)
+            self.last_error = None
+            self.frames_captured += 1
+            self.metrics.frames_captured.inc()
+            self.metrics.capture_rate.update(self.frames_captured)
+            packet = {
+                "camera_id": self.camera_id,
+                "frame_id": self.frames_captured,
+                "captured_at": time.time(),
+                "frame": frame,
+            }
+            if self.recorder is not None:
+                self.recorder.add(frame, packet["captured_at"])
+            if self.frame_bus is not None:
+                self.frame_bus.publish(frame, packet["captured_at"])
+            self.queues["preprocess"].put(packet, self._stop_event)
+
+    def _stage_loop(self, name, next_name, process):
+        inbox = self.queues[name]
+        outbox = self.queues[next_name] if next_name else None
+        stage_time = self.metrics.stage(name)
+
+        while not self._stop_event.is_set():
+            try:
+                packet = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if packet is END_OF_STREAM:
+                if outbox is not None:
+                    outbox.put_wait(END_OF_STREAM, self._stop_event)
+                else:
+                    self.finished.set()
+                return
+
+            start = time.perf_counter()
+            try:
+                packet = process(packet)
+            except Exception as e:
+                print(f"Pipeline {name} error: {e}", file=sys.stderr)
+                self.metrics.stage_error(name)
+                self._release(packet)
+                continue
+            stage_time.observe(time.perf_counter() - start)
+
+            if outbox is not None:
+                outbox.put(packet, self._stop_event)
+
+    def _on_drop(self, packet):
+        self.metrics.frames_dropped.inc()
+        self._release(packet)
+
+    def _release(self, packet):
+        if packet is not END_OF_STREAM and hasattr(self.preprocess, "release"):
+            self.preprocess.release(packet)
+
+    def _preprocess(self, packet):
+        if self.preprocess is not None:
+            packet.update(self.preprocess(packet["frame"]))
+        return packet
+
+    def _gate(self, packet):
+        if self.gate is not None:
+            packet["gate_open"] = self.gate.check(packet["frame"], tracking=self._tracking,
+                                                  now=packet["captured_at"])
+            packet["foreground"] = self.gate.foreground
+            packet["gate_reason"] = self.gate.reason
+        return packet
+
+    def _detect(self, packet):
+        if not packet.get("gate_open", True):
+            # Empty, static scene: skip inference entirely
+            self.metrics.frames_skipped.inc()
+            self._tracking = False
+            self._gate_closed = True
+            packet["human_present"] = False
+            packet["human_confidence"] = 0
+            packet["human_bboxes"] = []
+            packet["track_ids"] = self.tracker.update([]) if self.tracker is not None else []
+            return packet
+
+        # Reopened gate, keep-alive or sudden jump in motion (someone entering):
+        # nothing trustworthy to propagate, so the detector must really run
+        foreground = packet.get("foreground", 0)
+        if ((self._gate_closed or packet.get("gate_reason") == "keepalive"
+             or foreground - self._last_foreground > DETECTION_CONFIG["motion_trigger"])
+                and hasattr(self.detector, "force_detection")):
+            self.detector.force_detection()
+        self._last_foreground = foreground
+        self._gate_closed = False
+
+        human_present, human_confidence, human_bboxes = self.detector.detect_humans(packet["frame"])
+        self._tracking = len(human_bboxes) > 0
+        packet["human_present"] = human_present
+        packet["human_confidence"] = human_confidence
+        packet["human_bboxes"] = human_bboxes
+
+        packet["track_ids"] = []
+        if self.tracker is not None:
+            scores = getattr(self.detector, "last_scores", None)
+            if scores is not None and len(scores) != len(human_bboxes):
+                scores = None
+            packet["track_ids"] = self.tracker.update(human_bboxes, scores)
+        return packet
+
+    def _analyze_motion(self, packet):
+        # Called with no bboxes too, so the analyzer can reset its smoothing
+        activity, motion_level, confidence = self.motion_analyzer.analyze_motion(
+            packet["frame"], packet["human_bboxes"])
+
+        packet["track_activities"] = []
+        if self.activity_classifier is not None and self.tracker is not None:
+            packet["track_activities"] = self.activity_classifier.update(
+                packet["track_ids"], packet["human_bboxes"],
+                self.motion_analyzer.last_box_motion, packet["captured_at"])
+            person_activity = most_alarming(packet["track_activities"])
+            if person_activity is not None:
+                activity, confidence = person_activity, ACTIVITY_CONFIDENCE[person_activity]
+        packet["activity"] = activity
+        packet["motion_level"] = motion_level
+        packet["confidence"] = confidence
+        return packet
+
+    def _alert(self, packet):
+        packet["alert"] = None
+        if packet["activity"] != "no_humans" and self.alert_system.should_alert(
+                packet["activity"], packet["motion_level"], self.alert_cooldown):
+            clip_path = self.recorder.trigger(packet["captured_at"]) if self.recorder is not None else None
+            packet["alert"] = self.alert_system.add_alert(
+                packet["activity"], packet["motion_level"], packet["confidence"], clip_path=clip_path)
+            self.metrics.alert(packet["activity"])
+
+        packet["latency"] = time.time() - packet["captured_at"]
+        self.frames_processed += 1
+        self.metrics.frames_processed.inc()
+        self.metrics.processed_rate.update(self.frames_processed)
+        self.metrics.frame_latency.observe(packet["latency"])
+        with self._result_lock:
+            previous, self._latest_result = self._latest_result, packet
+        if previous is not None:
+            self._release(previous)
+
+        if self.on_result is not None:
+            self.on_result(packet)
+        return packet
@@ -0,0 +1,133 @@
+import threading
+import weakref
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Positive angles rotate counter-clockwise, matching cv2.getRotationMatrix2D
+ROTATE_CODES = {
+    90: cv2.ROTATE_90_COUNTERCLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_CLOCKWISE,
+}
+
+
+def rotate_frame(frame, angle, dst=None):
+    """Lossless rotation by a multiple of 90 degrees (transpose/flip, no cropping)"""
+    if angle % 360 == 0:
+        return frame
+    return cv2.rotate(frame, ROTATE_CODES[angle % 360], dst=dst)
+
+
+def scale_bboxes(bboxes, scale):
+    """Map [x, y, w, h] bboxes from analysis to display coordinates"""
+    if len(bboxes) == 0:
+        return []
+    scaled = np.asarray(bboxes, dtype=np.float32) * np.array([scale[0], scale[1], scale[0], scale[1]],
+                                                              dtype=np.float32)
+    return np.round(scaled).astype(np.int32).tolist()
+
+
+class BufferPool:
+    """Recycles frame buffers of a fixed shape instead of allocating one per frame
+
+    Released buffers go to the back of the free list, so a buffer that a
+    consumer may still be reading is the last one to be handed out again.
+    """
+
+    def __init__(self, max_free=8):
+        self.max_free = max_free
+        self._free = {}
+        self._owned = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                return free.popleft()
+        buffer = np.empty(shape, dtype=dtype)
+        with self._lock:
+            self._owned[id(buffer)] = buffer
+        return buffer
+
+    def release(self, buffer):
+        if buffer is None:
+            return
+        with self._lock:
+            if self._owned.get(id(buffer)) is not buffer:
+                return
+            free = self._free.setdefault((buffer.shape, buffer.dtype.str), deque())
+            if len(free) < self.max_free:
+                free.append(buffer)
+            else:
+                del self._owned[id(buffer)]
+
+
+class FramePreprocessor:
+    """Single preprocessing step: lossless rotation, one resize and BGR->RGB
+
+    Produces the full-resolution analysis frame (for detection and motion) and
+    an RGB display frame, both written into pooled buffers, plus the scale that
+    maps analysis coordinates onto the display frame.
+    """
+
+    def __init__(self, rotation=0, display_size=None, pool=None):
+        self.rotation = rotation % 360
+        # display_size=None disables the display frame (headless use)
+        self.display_size = display_size
+        self.pool = pool or BufferPool()
+        self._resized = None
+
+    def _display_size(self):
+        width, height = self.display_size
+        if self.rotation in (90, 270):
+            return height, width
+        return width, height
+
+    def __call__(self, frame):
+        """Returns the packet fields: frame, display and display_scale"""
+        if self.rotation:
+            height, width = frame.shape[:2]
+            shape = (width, height) + frame.shape[2:] if self.rotation in (90, 270) else frame.shape
+            analysis = rotate_frame(frame, self.rotation, dst=self.pool.acquire(shape, frame.dtype))
+        else:
+            analysis = frame
+
+        fields = {"frame": analysis, "display": None, "display_scale": (1.0, 1.0)}
+        if self.display_size is None:
+            return fields
+
+        width, height = self._display_size()
+        if self._resized is None or self._resized.shape[:2] != (height, width):
+            self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        cv2.resize(analysis, (width, height), dst=self._resized)
+
+        display = self.pool.acquire((height, width, 3))
+        cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=display)
+
+        fields["display"] = display
+        fields["display_scale"] = (width / analysis.shape[1], height / analysis.shape[0])
+        return fields
+
+    def detach(self, packet):
+        """Copy of packet with a private display copy, safe to keep after release()
+
+        A pooled (rotated) analysis frame is dropped rather than copied: no
+        consumer reads it, and copying it per poll is full-resolution memcpy.
+        """
+        detached = dict(packet)
+        if packet.get("display") is not None:
+            detached["display"] = packet["display"].copy()
+        if self.rotation:
+            detached["frame"] = None
+        return detached
+
+    def release(self, packet):
+        """Return a finished or dropped packet's buffers to the pool"""
+        self.pool.release(packet.get("display"))
+        if self.rotation:
+            self.pool.release(packet.get("frame"))
+
@@ -0,0 +1,138 @@
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from assets.config import PROFILER_CONFIG
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def profile_on_signal(pipeline, signum=None):
+    """Start pipeline.profile() whenever the process receives SIGUSR1 (POSIX, main thread only)"""
+    signum = signum or getattr(signal, "SIGUSR1", None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def handler(*args):
+        profiler = pipeline.profile()
+        print(f"Profiling {pipeline.camera_id} for {profiler.tags['frames']} frames", file=sys.stderr)
+
+    signal.signal(signum, handler)
+    return True
+
+
+class SamplingProfiler:
+    """Low-overhead statistical profiler over every thread in the process
+
+    A background thread snapshots all thread stacks every interval seconds
+    (sys._current_frames, no tracing hooks), so the monitored code runs at
+    full speed. Results are written as a flamegraph-compatible collapsed
+    stack file and a JSON call graph, tagged with the given config.
+    """
+
+    def __init__(self, name, interval=None, output_dir=None, tags=None):
+        self.name = str(name)
+        self.interval = interval or PROFILER_CONFIG["interval"]
+        self.output_dir = output_dir or PROFILER_CONFIG["dir"]
+        self.tags = tags or {}
+
+        self.stacks = Counter()
+        self.samples = 0
+        self.paths = None
+        self.started_at = None
+        self.finished = threading.Event()
+        self._until = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, until=None):
+        """Sample until until() returns True (or stop() is called), then write the results"""
+        self._until = until
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.paths
+
+    def _run(self):
+        own = threading.get_ident()
+        try:
+            while not self._stop_event.is_set() and not (self._until is not None and self._until()):
+                self._sample(own)
+                time.sleep(self.interval)
+        finally:
+            self.paths = self.write()
+            self.finished.set()
+
+    def _sample(self, own):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def call_graph(self, limit=200):
+        """Self/total sample counts per function and caller -> callee edge counts"""
+        self_counts, totals, edges = Counter(), Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for function in set(frames):
+                totals[function] += count
+            for edge in set(zip(frames, frames[1:])):
+                edges[edge] += count
+        return {
+            "functions": [{"function": f, "self": self_counts[f], "total": n}
+                          for f, n in totals.most_common(limit)],
+            "edges": [{"caller": a, "callee": b, "count": n} for (a, b), n in edges.most_common(limit)],
+        }
+
+    def write(self):
+        """Write <name>_<time>.collapsed and .json, returns both paths"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started_at or time.time()).strftime("%Y%m%d_%H%M%S")
+        name = re.sub(r"[^\w.-]", "_", self.name)
+        base = os.path.join(self.output_dir, f"{name}_{stamp}")
+
+        with open(base + ".collapsed", "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        report = {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": round(time.time() - (self.started_at or time.time()), 3),
+            "interval": self.interval,
+            "samples": self.samples,
+            "tags": self.tags,
+        }
+        report.update(self.call_graph())
+        with open(base + ".json", "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return base + ".collapsed", base + ".json"
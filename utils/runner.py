@@ -0,0 +1,143 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+from assets.config import ALERT_CONFIG, DETECTION_CONFIG
+from utils.detection import HumanDetector
+from utils.motion import MotionAnalyzer
+from utils.alerts import AlertSystem
+from utils.pipeline import MonitoringPipeline
+from utils.cadence import AdaptiveDetector
+from utils.gate import MotionGate
+from utils.tracker import ByteTracker
+from utils.activity import ActivityClassifier
+from utils.preprocess import FramePreprocessor
+from utils.camera import CameraStream, source_name
+from utils.clips import ClipRecorder
+from utils.profiler import profile_on_signal
+from utils.metrics import rss_bytes
+from models.cache import LOAD_REPORTS
+
+
+def open_source(source, name=None, decode_fps=None, decode_scale=None):
+    """Open a webcam index, video file or stream URL, returns (capture, is_file)
+
+    Live sources get a CameraStream (background connect, reconnect and
+    buffer draining); files are read frame by frame with VideoCapture.
+    """
+    if not isinstance(source, int) and os.path.isfile(source):
+        return cv2.VideoCapture(source), True
+    return CameraStream(source, name=name, decode_fps=decode_fps, decode_scale=decode_scale), False
+
+
+def result_to_record(result):
+    """JSON-serializable view of a pipeline result (without the frame)"""
+    return {
+        "camera_id": result["camera_id"],
+        "frame_id": result["frame_id"],
+        "timestamp": result["captured_at"],
+        "human_present": bool(result["human_present"]),
+        "human_confidence": float(result["human_confidence"]),
+        "human_bboxes": [[int(v) for v in bbox] for bbox in result["human_bboxes"]],
+        "track_ids": [int(track_id) for track_id in result.get("track_ids", [])],
+        "track_activities": result.get("track_activities", []),
+        "activity": result["activity"],
+        "motion_level": float(result["motion_level"]),
+        "confidence": result["confidence"],
+        "alert": result["alert"],
+        "latency": round(result["latency"], 4),
+    }
+
+
+class HeadlessRunner:
+    """Run the monitoring pipeline for one source without any UI"""
+
+    def __init__(self, source, output=None, camera_id=None, alert_cooldown=None,
+                 max_frames=None, rotation=0, dispatcher=None, profile_frames=None, decode_fps=None,
+                 decode_scale=None):
+        self.source = source
+        self.output = output if output is not None else sys.stdout
+        self.camera_id = camera_id or source_name(source)
+        self.alert_cooldown = (alert_cooldown if alert_cooldown is not None
+                               else DETECTION_CONFIG["alert_cooldown"])
+        self.max_frames = max_frames
+        self.rotation = rotation
+        # Profile the first N frames (SIGUSR1 profiles the next ones at any time)
+        self.profile_frames = profile_frames
+        # Live cameras only: decode at most decode_fps frames/s, MJPEG at 1/decode_scale size
+        self.decode_fps = decode_fps
+        self.decode_scale = decode_scale
+
+        self.detector = HumanDetector()
+        self.motion_analyzer = MotionAnalyzer()
+        self.alert_system = AlertSystem(camera_id=self.camera_id, dispatcher=dispatcher)
+
+        self.frames_written = 0
+        self._done = threading.Event()
+        self._write_lock = threading.Lock()
+
+    def _on_result(self, result):
+        with self._write_lock:
+            self.output.write(json.dumps(result_to_record(result)) + "\n")
+            self.frames_written += 1
+            if self.max_frames and self.frames_written >= self.max_frames:
+                self._done.set()
+
+    def run(self, duration=None):
+        """Process the source until it ends, max_frames/duration is hit or Ctrl-C"""
+        cap, is_file = open_source(self.source, self.camera_id, self.decode_fps, self.decode_scale)
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open source: {self.camera_id}")
+
+        # Files are processed losslessly; live streams drop stale frames
+        pipeline = MonitoringPipeline(
+            cap, AdaptiveDetector(self.detector), self.motion_analyzer, self.alert_system,
+            preprocess=FramePreprocessor(self.rotation) if self.rotation else None,
+            alert_cooldown=self.alert_cooldown,
+            drop_frames=not is_file,
+            stop_at_end=is_file,
+            on_result=self._on_result,
+            camera_id=self.camera_id,
+            gate=MotionGate(),
+            tracker=ByteTracker(),
+            activity_classifier=ActivityClassifier(),
+            recorder=ClipRecorder(self.camera_id) if ALERT_CONFIG["clips"]["enabled"] else None
+        )
+
+        start_time = time.time()
+        pipeline.start()
+        profile_on_signal(pipeline)
+        if self.profile_frames:
+            pipeline.profile(self.profile_frames)
+        try:
+            while not self._done.is_set() and not pipeline.finished.is_set():
+                if duration is not None and time.time() - start_time >= duration:
+                    break
+                self._done.wait(0.2)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pipeline.stop()
+            cap.release()
+            self.output.flush()
+            if pipeline.profiler is not None:
+                print(f"Profile written to {', '.join(pipeline.profiler.paths or [])}", file=sys.stderr)
+
+        elapsed = time.time() - start_time
+        return {
+            "camera_id": self.camera_id,
+            "frames_captured": pipeline.frames_captured,
+            "frames_processed": pipeline.frames_processed,
+            "frames_dropped": pipeline.frames_dropped,
+            "frames_gated": pipeline.gate.frames_skipped,
+            "frames_inferred": pipeline.gate.frames_inferred,
+            "alerts": len(self.alert_system.alerts),
+            "elapsed": round(elapsed, 3),
+            "fps": round(pipeline.frames_processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "model": LOAD_REPORTS.get(getattr(self.detector.backend, "name", None)),
+            "rss_mib": round(rss_bytes() / 2**20, 1),
+        }
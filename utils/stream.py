@@ -0,0 +1,216 @@
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from assets.config import UI_CONFIG
+from utils.preprocess import scale_bboxes
+
+BOUNDARY = "frame"
+
+
+def annotate_frame(result, rotation=0):
+    """RGB display frame of a pipeline result with boxes and the info overlay drawn on"""
+    # Display frame is already rotated, resized and RGB; copy before drawing on it
+    display_frame = result["display"].copy()
+    human_bboxes = result["human_bboxes"]
+
+    # Draw bounding boxes (mapped from analysis to display coordinates)
+    track_ids = result.get("track_ids") or [-1] * len(human_bboxes)
+    for (x, y, w, h), track_id in zip(scale_bboxes(human_bboxes, result["display_scale"]), track_ids):
+        label = f"HUMAN #{track_id}" if track_id >= 0 else "HUMAN"
+        cv2.rectangle(display_frame, (x, y), (x+w, y+h), (0, 255, 0), 3)
+        cv2.putText(display_frame, label, (x, y-10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    # Add overlay info
+    timestamp = datetime.fromtimestamp(result["captured_at"]).strftime("%Y-%m-%d %H:%M:%S")
+    cv2.putText(display_frame, timestamp, (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+    info_text = f"Humans: {len(human_bboxes)} | Frame: {result['frame_id']}"
+    cv2.putText(display_frame, info_text, (10, 60),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+    # Add orientation indicator
+    if rotation != 0:
+        cv2.putText(display_frame, f"Rotated: {rotation}°", (10, 90),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    return display_frame
+
+
+class _Feed:
+    """One pipeline's MJPEG feed, encoded on its own thread while someone is watching"""
+
+    def __init__(self, key, source, rotation, quality, max_fps):
+        self.key = key
+        self.source = source
+        self.rotation = rotation
+        self.quality = quality
+        self.max_fps = max_fps
+
+        self.jpeg = None
+        self.frame_id = 0
+        self.viewers = 0
+        self.frames_encoded = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self._thread = threading.Thread(target=self._encode_loop, name=f"mjpeg-{key}", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def wait_frame(self, last_id, timeout=1.0):
+        """(frame_id, jpeg) newer than last_id, or (last_id, None) on timeout"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.frame_id != last_id or self.closed, timeout)
+            if self.frame_id == last_id:
+                return last_id, None
+            return self.frame_id, self.jpeg
+
+    def _encode_loop(self):
+        last_result = None
+        while True:
+            with self.condition:
+                # Idle (no encoding at all) until a viewer connects; one encode then serves them all
+                self.condition.wait_for(lambda: self.viewers > 0 or self.jpeg is None or self.closed)
+                if self.closed:
+                    return
+            started = time.time()
+            result = self.source()
+            if result is not None and (last_result is None or result["frame_id"] != last_result["frame_id"]
+                                       or result["captured_at"] != last_result["captured_at"]):
+                last_result = result
+                frame = cv2.cvtColor(annotate_frame(result, self.rotation), cv2.COLOR_RGB2BGR)
+                ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    with self.condition:
+                        self.jpeg = encoded.tobytes()
+                        self.frame_id += 1
+                        self.frames_encoded += 1
+                        self.condition.notify_all()
+            time.sleep(max(0.0, 1.0 / self.max_fps - (time.time() - started)))
+
+
+class MJPEGStreamer:
+    """Serves annotated pipeline video as MJPEG over HTTP, one feed per pipeline
+
+    Each feed pulls its pipeline's newest result on its own thread (never on
+    the pipeline's threads), annotates and JPEG-encodes it once, and sends
+    the same bytes to every viewer of that feed, so adding viewers does not
+    add encoding work.
+    """
+
+    def __init__(self, host=None, port=None, quality=None, max_fps=None, public_url=None):
+        self.host = host or UI_CONFIG["stream_host"]
+        self.port = port if port is not None else UI_CONFIG["stream_port"]
+        # What the browser requests, which differs from the bind address for remote viewers
+        self.public_url = public_url or UI_CONFIG["stream_public_url"]
+        self.quality = quality or UI_CONFIG["stream_quality"]
+        self.max_fps = max_fps or UI_CONFIG["stream_max_fps"]
+
+        self.feeds = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def url(self, key):
+        base = self.public_url.rstrip("/") if self.public_url else f"http://{self.host}:{self.server_port}"
+        return f"{base}/{key}/stream.mjpg"
+
+    @property
+    def server_port(self):
+        return self._server.server_address[1] if self._server is not None else self.port
+
+    def add_feed(self, key, source, rotation=0):
+        """Serve source() (e.g. pipeline.latest_result) under key, replacing an older feed, returns its URL"""
+        feed = _Feed(str(key), source, rotation, self.quality, self.max_fps)
+        with self._lock:
+            previous, self.feeds[feed.key] = self.feeds.get(feed.key), feed
+        if previous is not None:
+            previous.close()
+        return self.url(feed.key)
+
+    def remove_feed(self, key):
+        with self._lock:
+            feed = self.feeds.pop(str(key), None)
+        if feed is not None:
+            feed.close()
+
+    def start(self):
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mjpeg-server", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        with self._lock:
+            feeds, self.feeds = list(self.feeds.values()), {}
+        for feed in feeds:
+            feed.close()
+
+    def _handler(self):
+        streamer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                key, _, name = self.path.lstrip("/").partition("/")
+                feed = streamer.feeds.get(key)
+                if feed is None:
+                    self.send_error(404)
+                elif name.startswith("stream.mjpg"):
+                    self._stream(feed)
+                elif name.startswith("snapshot.jpg") and feed.jpeg is not None:
+                    self._send_jpeg(feed.jpeg)
+                else:
+                    self.send_error(404)
+
+            def _send_jpeg(self, jpeg):
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(jpeg)))
+                self.end_headers()
+                self.wfile.write(jpeg)
+
+            def _stream(self, feed):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache, private")
+                self.send_header("Pragma", "no-cache")
+                self.end_headers()
+
+                with feed.condition:
+                    feed.viewers += 1
+                    feed.condition.notify_all()
+                last_id = 0
+                try:
+                    while streamer._server is not None and not feed.closed:
+                        last_id, jpeg = feed.wait_frame(last_id)
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                         f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with feed.condition:
+                        feed.viewers -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,273 @@
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+
+from assets.config import ALERT_CONFIG, DETECTION_CONFIG, SUPERVISOR_CONFIG
+
+
+def _pin_to_core(core):
+    """Pin the current process to one CPU core where the OS supports it"""
+    if core is None or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(0, {core})
+    except OSError as e:
+        print(f"Could not pin to core {core}: {e}", file=sys.stderr)
+
+
+def _camera_worker(camera_id, source, core, events, stop_event, alert_cooldown, share_frames=False,
+                   metrics_port=None, decode=None, rotation=0, profile_frames=None):
+    """Process entry point: one full pipeline with its own detector and MOG2 state"""
+    _pin_to_core(core)
+
+    # One core per camera: keep OpenCV/torch from spawning competing thread pools
+    import cv2
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    from utils.detection import HumanDetector
+    from utils.motion import MotionAnalyzer
+    from utils.alerts import AlertSystem
+    from utils.pipeline import MonitoringPipeline
+    from utils.cadence import AdaptiveDetector
+    from utils.gate import MotionGate
+    from utils.tracker import ByteTracker
+    from utils.activity import ActivityClassifier
+    from utils.clips import ClipRecorder
+    from utils.framebus import FramePublisher
+    from utils.metrics import MetricsServer
+    from utils.preprocess import FramePreprocessor
+    from utils.profiler import profile_on_signal
+    from utils.camera import source_name
+    from utils.runner import open_source
+
+    if metrics_port is not None:
+        MetricsServer(port=metrics_port).start()
+
+    cap, is_file = open_source(source, camera_id, **(decode or {}))
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open source: {source_name(source)}")
+
+    def on_result(result):
+        if result["alert"] is not None:
+            events.put(("alert", camera_id, dict(result["alert"], camera_id=camera_id)))
+
+    pipeline = MonitoringPipeline(
+        cap, AdaptiveDetector(HumanDetector()), MotionAnalyzer(), AlertSystem(camera_id=camera_id),
+        preprocess=FramePreprocessor(rotation) if rotation else None,
+        alert_cooldown=alert_cooldown,
+        drop_frames=not is_file,
+        stop_at_end=is_file,
+        on_result=on_result,
+        camera_id=camera_id,
+        gate=MotionGate(),
+        tracker=ByteTracker(),
+        activity_classifier=ActivityClassifier(),
+        recorder=ClipRecorder(camera_id) if ALERT_CONFIG["clips"]["enabled"] else None,
+        # Bus sized from the camera's own frames; its name goes to the supervisor
+        frame_bus=(FramePublisher(on_create=lambda bus: events.put(("bus", camera_id, bus.name)))
+                   if share_frames else None)
+    )
+    pipeline.start()
+    # kill -USR1 <worker pid> profiles this camera without restarting it
+    profile_on_signal(pipeline)
+    if profile_frames:
+        pipeline.profile(profile_frames)
+    try:
+        while not stop_event.is_set() and not pipeline.finished.is_set():
+            if not pipeline.running:
+                raise RuntimeError("Pipeline threads exited unexpectedly")
+            stop_event.wait(0.5)
+    finally:
+        pipeline.stop()
+        cap.release()
+        if pipeline.frame_bus is not None:
+            pipeline.frame_bus.close()
+        if pipeline.profiler is not None:
+            print(f"Camera {camera_id} profile written to {', '.join(pipeline.profiler.paths or [])}",
+                  file=sys.stderr)
+        events.put(("stats", camera_id, {
+            "frames_captured": pipeline.frames_captured,
+            "frames_processed": pipeline.frames_processed,
+            "frames_dropped": pipeline.frames_dropped,
+            "frames_gated": pipeline.gate.frames_skipped,
+            "frames_inferred": pipeline.gate.frames_inferred,
+        }))
+
+
+class CameraSupervisor:
+    """Runs one camera pipeline per process and restarts crashed workers
+
+    Each worker owns its HumanDetector smoothing and MotionAnalyzer background
+    model, is pinned to its own core, and forwards alerts to one shared queue.
+    """
+
+    def __init__(self, cameras, pin_cores=None, alert_cooldown=None, max_restarts=None,
+                 share_frames=False, metrics_port=None, decode=None, rotation=0, profile_frames=None):
+        # cameras: {camera_id: source}
+        self.cameras = dict(cameras)
+        self.pin_cores = SUPERVISOR_CONFIG["pin_cores"] if pin_cores is None else pin_cores
+        self.alert_cooldown = (alert_cooldown if alert_cooldown is not None
+                               else DETECTION_CONFIG["alert_cooldown"])
+        self.max_restarts = (SUPERVISOR_CONFIG["max_restarts"] if max_restarts is None
+                             else max_restarts)
+
+        self._ctx = mp.get_context("spawn")
+        self.events = self._ctx.Queue()
+        self._stop_event = self._ctx.Event()
+        self.workers = {}
+        self.restarts = {camera_id: 0 for camera_id in self.cameras}
+        self.stats = {}
+        self._restart_at = {}
+        # Optional FrameBus per camera (created by its worker, attached here once
+        # the first frame sets its size) so other processes (UI, recorders) can
+        # read captured frames without pickling them
+        self.share_frames = share_frames
+        self.buses = {}
+        # Each worker serves its own /metrics on metrics_port + 1 + its index
+        self.metrics_port = metrics_port
+        # Optional per-camera decode settings: {camera_id: {"decode_fps": .., "decode_scale": ..}}
+        self.decode = decode or {}
+        # Applied to every camera: rotate frames before analysis, profile the first N frames
+        self.rotation = rotation
+        self.profile_frames = profile_frames
+
+    def _core_for(self, index):
+        if not self.pin_cores:
+            return None
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") \
+            else list(range(os.cpu_count() or 1))
+        return cores[index % len(cores)]
+
+    def _spawn(self, camera_id):
+        index = list(self.cameras).index(camera_id)
+        process = self._ctx.Process(
+            target=_camera_worker,
+            args=(camera_id, self.cameras[camera_id], self._core_for(index),
+                  self.events, self._stop_event, self.alert_cooldown,
+                  self.share_frames,
+                  self.metrics_port + 1 + index if self.metrics_port is not None else None,
+                  self.decode.get(camera_id), self.rotation, self.profile_frames),
+            name=f"camera-{camera_id}",
+            daemon=True
+        )
+        process.start()
+        self.workers[camera_id] = process
+
+    def start(self):
+        """Start one worker process per camera"""
+        self._stop_event.clear()
+        for camera_id in self.cameras:
+            self._spawn(camera_id)
+
+    def stop(self, timeout=5.0, on_alert=None):
+        """Stop all workers, terminating any that do not exit in time
+
+        Alerts still queued when the workers exit are passed to on_alert.
+        """
+        self._stop_event.set()
+        for process in self.workers.values():
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        self._drain_events(on_alert)
+        for bus in self.buses.values():
+            bus.close()
+            try:
+                # Normally freed by its worker; not when the worker was terminated
+                bus.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.buses = {}
+
+    def poll(self):
+        """Restart crashed workers with exponential backoff, returns True while any is running"""
+        now = time.time()
+        for camera_id, process in list(self.workers.items()):
+            if process.is_alive() or self._stop_event.is_set():
+                continue
+            if process.exitcode == 0:
+                # Finite source finished cleanly
+                continue
+            if self.max_restarts is not None and self.restarts[camera_id] >= self.max_restarts:
+                continue
+
+            if camera_id not in self._restart_at:
+                backoff = min(SUPERVISOR_CONFIG["restart_backoff"] * (2 ** self.restarts[camera_id]),
+                              SUPERVISOR_CONFIG["max_restart_backoff"])
+                self._restart_at[camera_id] = now + backoff
+                print(f"Camera {camera_id} worker exited ({process.exitcode}), restarting in {backoff:.1f}s",
+                      file=sys.stderr)
+            elif now >= self._restart_at[camera_id]:
+                del self._restart_at[camera_id]
+                self.restarts[camera_id] += 1
+                self._spawn(camera_id)
+
+        return any(process.is_alive() for process in self.workers.values()) or bool(self._restart_at)
+
+    def get_alert(self, timeout=None):
+        """Next alert from any camera (with camera_id set), or None on timeout"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                kind, camera_id, payload = self.events.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if kind == "alert":
+                return payload
+            self._record(kind, camera_id, payload)
+
+    def _drain_events(self, on_alert=None):
+        while True:
+            try:
+                kind, camera_id, payload = self.events.get(timeout=0.1)
+            except queue.Empty:
+                return
+            if kind != "alert":
+                self._record(kind, camera_id, payload)
+            elif on_alert is not None:
+                on_alert(payload)
+
+    def _record(self, kind, camera_id, payload):
+        if kind == "stats":
+            self.stats[camera_id] = payload
+        elif kind == "bus":
+            # A worker (re)created its bus: first frame, new resolution or restart
+            from utils.framebus import FrameBus
+            previous = self.buses.pop(camera_id, None)
+            if previous is not None:
+                previous.close()
+            try:
+                self.buses[camera_id] = FrameBus.attach(payload)
+            except FileNotFoundError:
+                # Already freed by a worker that has exited
+                pass
+
+    def run(self, on_alert, duration=None):
+        """Supervise until all workers finish, duration elapses or Ctrl-C"""
+        start_time = time.time()
+        self.start()
+        try:
+            while self.poll():
+                if duration is not None and time.time() - start_time >= duration:
+                    break
+                alert = self.get_alert(timeout=0.5)
+                if alert is not None:
+                    on_alert(alert)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop(on_alert=on_alert)
+        return {
+            "cameras": len(self.cameras),
+            "elapsed": round(time.time() - start_time, 3),
+            "restarts": dict(self.restarts),
+            "stats": dict(self.stats),
+        }
@@ -0,0 +1,185 @@
+import sys
+
+import numpy as np
+
+from assets.config import DETECTION_CONFIG
+from utils.detection import box_iou
+
+
+def _greedy_match(iou, threshold):
+    """Match rows to columns by descending IoU, returns (row_idx, col_idx) arrays"""
+    if iou.size == 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_rows = np.zeros(iou.shape[0], bool)
+    used_cols = np.zeros(iou.shape[1], bool)
+    matched_rows, matched_cols = [], []
+    for r, c in zip(rows[order], cols[order]):
+        if not used_rows[r] and not used_cols[c]:
+            used_rows[r] = used_cols[c] = True
+            matched_rows.append(r)
+            matched_cols.append(c)
+    return np.array(matched_rows, np.int64), np.array(matched_cols, np.int64)
+
+
+class ByteTracker:
+    """IoU + Kalman multi-object tracker in the style of ByteTrack
+
+    Track state lives in fixed-capacity NumPy arrays (one row per slot)
+    instead of per-track objects: Kalman mean/covariance over
+    (cx, cy, w, h, vx, vy, vw, vh), ids, hit counts, ages and misses.
+    High-score detections are matched first, then low-score ones are used
+    to keep existing tracks alive through partial occlusion.
+    """
+
+    def __init__(self, capacity=None, high_threshold=None, low_threshold=None,
+                 match_iou=None, max_misses=None):
+        config = DETECTION_CONFIG["tracker"]
+        self.capacity = capacity or config["capacity"]
+        self.high_threshold = high_threshold if high_threshold is not None else config["high_threshold"]
+        self.low_threshold = low_threshold if low_threshold is not None else config["low_threshold"]
+        self.match_iou = match_iou if match_iou is not None else config["match_iou"]
+        self.max_misses = max_misses if max_misses is not None else config["max_misses"]
+
+        n = self.capacity
+        self.mean = np.zeros((n, 8), np.float32)
+        self.covariance = np.zeros((n, 8, 8), np.float32)
+        self.ids = np.full(n, -1, np.int64)
+        self.active = np.zeros(n, bool)
+        self.hits = np.zeros(n, np.int32)
+        self.ages = np.zeros(n, np.int32)
+        self.misses = np.zeros(n, np.int32)
+        self.scores = np.zeros(n, np.float32)
+        self._next_id = 1
+
+        # Constant-velocity model
+        self._F = np.eye(8, dtype=np.float32)
+        self._F[:4, 4:] = np.eye(4, dtype=np.float32)
+        self._H = np.eye(4, 8, dtype=np.float32)
+        self._std_position = 1.0 / 20
+        self._std_velocity = 1.0 / 160
+
+    def reset(self):
+        self.active[:] = False
+        self.ids[:] = -1
+
+    # --- Kalman filter, vectorized over slots ---------------------------------
+
+    def _predict(self, slots):
+        if len(slots) == 0:
+            return
+        scale = self.mean[slots, 3:4]
+        std = np.concatenate([np.repeat(scale * self._std_position, 4, axis=1),
+                              np.repeat(scale * self._std_velocity, 4, axis=1)], axis=1)
+        Q = np.zeros((len(slots), 8, 8), np.float32)
+        Q[:, np.arange(8), np.arange(8)] = std ** 2
+
+        self.mean[slots] = self.mean[slots] @ self._F.T
+        self.covariance[slots] = self._F @ self.covariance[slots] @ self._F.T + Q
+
+    def _update(self, slots, measurements):
+        if len(slots) == 0:
+            return
+        P = self.covariance[slots]
+        scale = self.mean[slots, 3:4]
+        R = np.zeros((len(slots), 4, 4), np.float32)
+        R[:, np.arange(4), np.arange(4)] = np.repeat((scale * self._std_position) ** 2, 4, axis=1)
+
+        PHt = P @ self._H.T
+        S = self._H @ PHt + R
+        K = PHt @ np.linalg.inv(S)
+        innovation = measurements - self.mean[slots, :4]
+        self.mean[slots] += (K @ innovation[:, :, None])[:, :, 0]
+        self.covariance[slots] = P - K @ self._H @ P
+
+    def _initiate(self, measurements, scores):
+        free = np.flatnonzero(~self.active)[:len(measurements)]
+        if len(free) < len(measurements):
+            print(f"Tracker capacity {self.capacity} reached, dropping {len(measurements) - len(free)} new tracks",
+                  file=sys.stderr)
+        measurements = measurements[:len(free)]
+
+        self.mean[free, :4] = measurements
+        self.mean[free, 4:] = 0
+        scale = measurements[:, 3:4]
+        std = np.concatenate([np.repeat(scale * 2 * self._std_position, 4, axis=1),
+                              np.repeat(scale * 10 * self._std_velocity, 4, axis=1)], axis=1)
+        self.covariance[free] = 0
+        self.covariance[free[:, None], np.arange(8), np.arange(8)] = std ** 2
+
+        self.ids[free] = np.arange(self._next_id, self._next_id + len(free))
+        self._next_id += len(free)
+        self.active[free] = True
+        self.hits[free] = 1
+        self.ages[free] = 0
+        self.misses[free] = 0
+        self.scores[free] = scores[:len(free)]
+        return free
+
+    # --- Public API -----------------------------------------------------------
+
+    def predicted_boxes(self, slots):
+        """xyxy boxes of the given slots from the current Kalman mean"""
+        cxcy, wh = self.mean[slots, :2], np.maximum(self.mean[slots, 2:4], 1)
+        return np.concatenate([cxcy - wh / 2, cxcy + wh / 2], axis=1)
+
+    def update(self, bboxes, scores=None):
+        """Advance one frame with [x, y, w, h] detections
+
+        Returns a track id per input bbox (-1 for detections not tracked).
+        """
+        boxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        scores = (np.ones(len(boxes), np.float32) if scores is None
+                  else np.asarray(scores, dtype=np.float32).reshape(-1))
+        measurements = np.concatenate([boxes[:, :2] + boxes[:, 2:] / 2, boxes[:, 2:]], axis=1)
+        det_xyxy = np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=1)
+        track_ids = np.full(len(boxes), -1, np.int64)
+
+        slots = np.flatnonzero(self.active)
+        was_tracked = self.misses[slots] == 0
+        self._predict(slots)
+        self.ages[slots] += 1
+
+        high = np.flatnonzero(scores >= self.high_threshold)
+        low = np.flatnonzero((scores >= self.low_threshold) & (scores < self.high_threshold))
+
+        # Stage 1: high-score detections against every live track
+        rows, cols = _greedy_match(box_iou(self.predicted_boxes(slots), det_xyxy[high]), self.match_iou)
+        matched_slots, matched_dets = slots[rows], high[cols]
+        unmatched = np.ones(len(slots), bool)
+        unmatched[rows] = False
+
+        # Stage 2: low-score detections keep recently tracked tracks alive
+        remaining = slots[unmatched & was_tracked]
+        rows2, cols2 = _greedy_match(box_iou(self.predicted_boxes(remaining), det_xyxy[low]), 0.5)
+        matched_slots = np.concatenate([matched_slots, remaining[rows2]])
+        matched_dets = np.concatenate([matched_dets, low[cols2]])
+
+        self._update(matched_slots, measurements[matched_dets])
+        self.hits[matched_slots] += 1
+        self.misses[matched_slots] = 0
+        self.scores[matched_slots] = scores[matched_dets]
+        track_ids[matched_dets] = self.ids[matched_slots]
+
+        # Unmatched tracks age out; unmatched high-score detections start new tracks
+        lost = np.setdiff1d(slots, matched_slots, assume_unique=True)
+        self.misses[lost] += 1
+        expired = lost[self.misses[lost] > self.max_misses]
+        self.active[expired] = False
+        self.ids[expired] = -1
+
+        new_dets = np.setdiff1d(high, matched_dets, assume_unique=True)
+        if len(new_dets) > 0:
+            new_slots = self._initiate(measurements[new_dets], scores[new_dets])
+            track_ids[new_dets[:len(new_slots)]] = self.ids[new_slots]
+
+        return track_ids.tolist()
+
+    def tracks(self):
+        """Currently updated tracks as (ids, [x, y, w, h] boxes, (vx, vy) velocities)"""
+        slots = np.flatnonzero(self.active & (self.misses == 0))
+        xyxy = self.predicted_boxes(slots)
+        boxes = np.concatenate([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+        return self.ids[slots], boxes, self.mean[slots, 4:6]